@@ -1,6 +1,130 @@
+import collections
+import concurrent.futures
+import functools
 import os
 import re
+import string
+import sys
 
+# Single pattern used by standardize_name, so a name is scanned once. The
+# alternatives are tried in order:
+#   1. a capital that ends a camelCase word (preceded by a letter, digit or '&',
+#      since '&' becomes 'and')
+#   2. a run of spaces or dashes
+#   3. an ampersand
+#   4. any other character that is not allowed as-is
+STANDARDIZE_PATTERN = re.compile(r'(?<=[^\W_]|&)([A-Z])|([\s\-]+)|(&)|([^a-z0-9_.])')
+
+# Number of rename messages to buffer before writing them to stdout
+OUTPUT_BATCH_SIZE = 1000
+
+# Characters that survive standardization unchanged
+ALLOWED_CHARS = frozenset(string.ascii_lowercase + string.digits + '_.')
+
+# List of files/patterns to preserve exactly as-is
+PRESERVED_NAMES = frozenset({
+    # System files
+    '.DS_Store', 'Thumbs.db', 'desktop.ini',
+    # Git files
+    '.git', '.gitignore', '.gitattributes', 'README.md', 'LICENSE',
+    # Node/JS files
+    'package.json', 'package-lock.json', 'node_modules',
+    # Python files
+    '__init__.py', '__pycache__', 'requirements.txt', 'setup.py', 'setup.cfg',
+    # Config files
+    '.env', '.editorconfig', '.eslintrc', '.prettierrc', '.babelrc',
+    # Build files
+    'Makefile', 'CMakeLists.txt', 'Dockerfile', 'docker-compose.yml',
+    # IDE files
+    '.vscode', '.idea', '.project', '.classpath',
+    # Common web files
+    'favicon.ico', 'robots.txt', 'sitemap.xml',
+    # Documentation
+    'CHANGELOG.md', 'CONTRIBUTING.md', 'CODE_OF_CONDUCT.md',
+    # Temp files
+    '~$*',  # Microsoft Office temp files
+    '.#*',  # Emacs temp files
+    '*.swp', # Vim temp files
+    # Config files
+    '.htaccess', 'web.config', 'app.config',
+    # Build outputs
+    'dist', 'build', 'target', 'out',
+    # Database files
+    '.sqlite', '.db',
+    # Log files
+    '*.log', 'logs',
+    # Cache directories
+    '.cache', '.tmp', 'temp',
+    # Package manager files
+    'yarn.lock', 'composer.json', 'composer.lock',
+    # CI/CD files
+    '.travis.yml', '.gitlab-ci.yml', 'jenkins.yml',
+    # Test files
+    'phpunit.xml', 'jest.config.js', 'karma.conf.js',
+    # Security files
+    '.npmrc', '.yarnrc', '.dockerignore',
+    # Framework specific
+    'angular.json', 'tsconfig.json', 'webpack.config.js',
+    # OS specific
+    '.bashrc', '.bash_profile', '.zshrc',
+    # Backup files
+    '*.bak', '*.backup', '*.old',
+    # Certificate files
+    '*.pem', '*.crt', '*.key',
+    # Font files
+    '*.ttf', '*.otf', '*.woff', '*.woff2',
+    # Media placeholder files
+    '.keep', '.gitkeep',
+    # Common config files
+    'config.yml', 'config.json', 'settings.json',
+    # Dependency files
+    'Gemfile', 'Gemfile.lock', 'requirements.in',
+    # Shell scripts
+    '*.sh', '*.bash', '*.zsh',
+    # Version files
+    'VERSION', '.ruby-version', '.python-version',
+    # Project files
+    '.project', '.buildpath', '.settings',
+    # Resource files
+    '*.rc', '.mailmap', '.gvimrc',
+    # Meta files
+    'META-INF', 'MANIFEST.MF',
+    # Template files
+    '*.template', '*.tpl',
+    # System files
+    'lost+found',
+    # Misc development files
+    '.flowconfig', '.watchmanconfig', '.buckconfig',
+    # Documentation generators
+    'mkdocs.yml', 'sphinx.conf', 'doxygen.conf'
+})
+
+# Literal suffixes of the wildcard patterns, for a single str.endswith call
+PRESERVED_SUFFIXES = tuple(pat.replace('*', '') for pat in PRESERVED_NAMES if '*' in pat)
+
+def replace_match(match):
+    """
+    Replacement callback for STANDARDIZE_PATTERN.
+    
+    Args:
+        match: A match of one of the pattern's alternatives
+        
+    Returns:
+        str: The text to substitute for the match
+    """
+    group = match.lastindex
+    if group == 1:
+        # camelCase boundary
+        return '_' + match.group(1).lower()
+    if group == 2:
+        # Separator run
+        return '_'
+    if group == 3:
+        return 'and'
+    # Lowercase and drop anything that is still not allowed
+    return ''.join(char for char in match.group(4).lower() if char in ALLOWED_CHARS)
+
+@functools.lru_cache(maxsize=8192)
 def standardize_name(name):
     """
     Standardize the name according to the rules:
@@ -10,155 +134,193 @@ def standardize_name(name):
     - Replace spaces, dashes, and other separators with underscores
     - Remove special characters except alphanumeric, underscores, and dots
     """
-    # List of files/patterns to preserve exactly as-is
-    preserved_names = {
-        # System files
-        '.DS_Store', 'Thumbs.db', 'desktop.ini',
-        # Git files
-        '.git', '.gitignore', '.gitattributes', 'README.md', 'LICENSE',
-        # Node/JS files
-        'package.json', 'package-lock.json', 'node_modules',
-        # Python files
-        '__init__.py', '__pycache__', 'requirements.txt', 'setup.py', 'setup.cfg',
-        # Config files
-        '.env', '.editorconfig', '.eslintrc', '.prettierrc', '.babelrc',
-        # Build files
-        'Makefile', 'CMakeLists.txt', 'Dockerfile', 'docker-compose.yml',
-        # IDE files
-        '.vscode', '.idea', '.project', '.classpath',
-        # Common web files
-        'favicon.ico', 'robots.txt', 'sitemap.xml',
-        # Documentation
-        'CHANGELOG.md', 'CONTRIBUTING.md', 'CODE_OF_CONDUCT.md',
-        # Temp files
-        '~$*',  # Microsoft Office temp files
-        '.#*',  # Emacs temp files
-        '*.swp', # Vim temp files
-        # Config files
-        '.htaccess', 'web.config', 'app.config',
-        # Build outputs
-        'dist', 'build', 'target', 'out',
-        # Database files
-        '.sqlite', '.db',
-        # Log files
-        '*.log', 'logs',
-        # Cache directories
-        '.cache', '.tmp', 'temp',
-        # Package manager files
-        'yarn.lock', 'composer.json', 'composer.lock',
-        # CI/CD files
-        '.travis.yml', '.gitlab-ci.yml', 'jenkins.yml',
-        # Test files
-        'phpunit.xml', 'jest.config.js', 'karma.conf.js',
-        # Security files
-        '.npmrc', '.yarnrc', '.dockerignore',
-        # Framework specific
-        'angular.json', 'tsconfig.json', 'webpack.config.js',
-        # OS specific
-        '.bashrc', '.bash_profile', '.zshrc',
-        # Backup files
-        '*.bak', '*.backup', '*.old',
-        # Certificate files
-        '*.pem', '*.crt', '*.key',
-        # Font files
-        '*.ttf', '*.otf', '*.woff', '*.woff2',
-        # Media placeholder files
-        '.keep', '.gitkeep',
-        # Common config files
-        'config.yml', 'config.json', 'settings.json',
-        # Dependency files
-        'Gemfile', 'Gemfile.lock', 'requirements.in',
-        # Shell scripts
-        '*.sh', '*.bash', '*.zsh',
-        # Version files
-        'VERSION', '.ruby-version', '.python-version',
-        # Project files
-        '.project', '.buildpath', '.settings',
-        # Resource files
-        '*.rc', '.mailmap', '.gvimrc',
-        # Meta files
-        'META-INF', 'MANIFEST.MF',
-        # Template files
-        '*.template', '*.tpl',
-        # System files
-        'lost+found',
-        # Misc development files
-        '.flowconfig', '.watchmanconfig', '.buckconfig',
-        # Documentation generators
-        'mkdocs.yml', 'sphinx.conf', 'doxygen.conf'
-    }
-    
     # Check if the name should be preserved
-    if name in preserved_names or any(name.endswith(pat.replace('*', '')) for pat in preserved_names if '*' in pat):
+    if name in PRESERVED_NAMES or name.endswith(PRESERVED_SUFFIXES):
+        return name
+    
+    # Names made only of allowed characters are already standardized
+    if ALLOWED_CHARS.issuperset(name):
         return name
         
-    # Original standardization logic continues here...
-    name = name.replace('&', 'and')
-    name = re.sub(r'(?<!^)(?<![\W_])([A-Z])', r'_\1', name)
-    name = name.lower()
-    name = re.sub(r'[\s\-]+', '_', name)
-    name = re.sub(r'[^a-z0-9_.]', '', name)
-    return name
+    # Apply all the rules in a single pass over the name
+    return STANDARDIZE_PATTERN.sub(replace_match, name)
 
-def get_unique_path(path):
+def get_unique_name(name, existing_names):
     """
-    Generate a unique path by adding a number suffix if the path already exists.
+    Generate a unique name by adding a number suffix if the name already exists.
+    
+    existing_names is a Counter of the lowercased names already present in the
+    target directory. Lookups are case-insensitive, so a name is only free once
+    no entry differing just by case is left, and case-insensitive filesystems
+    cannot silently overwrite a sibling. The chosen name is counted.
     """
-    if not os.path.exists(path):
-        return path
+    if name.lower() not in existing_names:
+        existing_names[name.lower()] += 1
+        return name
     
-    # Split the path into base and extension
-    base, ext = os.path.splitext(path)
+    # Split the name into base and extension
+    base, ext = os.path.splitext(name)
     counter = 1
     
-    # Keep trying new numbers until we find an unused path
-    while os.path.exists(f"{base}_{counter}{ext}"):
+    # Keep trying new numbers until we find an unused name
+    while f"{base}_{counter}{ext}".lower() in existing_names:
         counter += 1
     
-    return f"{base}_{counter}{ext}"
+    unique_name = f"{base}_{counter}{ext}"
+    existing_names[unique_name.lower()] += 1
+    return unique_name
 
-def rename_files_recursive(directory):
+def release_name(name, existing_names):
     """
-    Recursively rename files in the directory and subdirectories.
+    Stop counting a name that is being renamed away from.
+    
+    The lowercased name is only dropped from existing_names once no other entry
+    that differs just by case still uses it.
+    """
+    key = name.lower()
+    existing_names[key] -= 1
+    if existing_names[key] <= 0:
+        del existing_names[key]
+
+def collect_directories(directory):
+    """
+    Collect every directory under (and including) the given directory along with
+    its scandir entries, in pre-order (parents before their descendants).
+    """
+    collected = []
+    stack = [directory]
+    
+    while stack:
+        root = stack.pop()
+        try:
+            with os.scandir(root) as it:
+                entries = list(it)
+        except OSError:
+            # Skip unreadable directories, as os.walk does by default
+            continue
+        collected.append((root, entries))
+        # Descend into real subdirectories only (do not follow symlinks)
+        stack.extend(entry.path for entry in entries if entry.is_dir(follow_symlinks=False))
+    
+    return collected
+
+def open_directory(path):
+    """
+    Open a directory file descriptor for use with dir_fd-relative renames.
+    
+    Returns None when the platform does not support dir_fd renames, in which
+    case callers fall back to full paths.
+    """
+    if os.rename not in os.supports_dir_fd or not hasattr(os, 'O_DIRECTORY'):
+        return None
+    return os.open(path, os.O_RDONLY | os.O_DIRECTORY | getattr(os, 'O_CLOEXEC', 0))
+
+def rename_in_directory(root, dir_fd, old_name, new_name):
+    """
+    Rename an entry inside root, relative to dir_fd when one is available.
+    """
+    if dir_fd is None:
+        os.rename(os.path.join(root, old_name), os.path.join(root, new_name))
+    else:
+        os.rename(old_name, new_name, src_dir_fd=dir_fd, dst_dir_fd=dir_fd)
+
+def write_lines(lines):
+    """
+    Write buffered output lines to stdout in a single call and clear the buffer.
+    """
+    if lines:
+        sys.stdout.write('\n'.join(lines) + '\n')
+        lines.clear()
+
+def rename_directory_entries(pool, root, entries, output_lines):
     """
-    # First collect all paths to avoid modification during iteration
-    all_files = []
-    all_dirs = []
-    
-    for root, dirs, files in os.walk(directory, topdown=False):
-        # Collect file paths
-        for file in files:
-            all_files.append((root, file))
-        # Collect directory paths
-        for dir_name in dirs:
-            all_dirs.append((root, dir_name))
-    
-    # Process all files first
-    for root, file in all_files:
-        # Generate the new file name
-        new_name = standardize_name(file)
-        # Construct full file paths
-        old_path = os.path.join(root, file)
-        new_path = os.path.join(root, new_name)
+    Rename the files and then the subdirectories directly inside root.
+    
+    Renames are submitted to the pool and waited on before returning; a message
+    for each completed rename is appended to output_lines.
+    """
+    files = [entry for entry in entries if not entry.is_dir()]
+    dirs = [entry for entry in entries if entry.is_dir()]
+    # Names currently in this directory, used to resolve naming conflicts. They
+    # are counted since entries can differ only by case
+    existing_names = collections.Counter(entry.name.lower() for entry in entries)
+    # In-flight renames keyed by the lowercased name they are moving away from
+    pending = {}
+    # Submitted renames and the message to report once each completes
+    submitted = []
+    
+    def submit_rename(entry, new_name, label):
+        # A name freed by an in-flight rename can only be reused once
+        # that rename has finished
+        if new_name.lower() in pending:
+            pending[new_name.lower()].result()
+        future = pool.submit(rename_in_directory, root, dir_fd, entry.name, new_name)
+        pending[entry.name.lower()] = future
+        submitted.append((future, f"{label}: {entry.path} -> {os.path.join(root, new_name)}"))
+    
+    # Open the directory once so renames only resolve bare names
+    dir_fd = open_directory(root)
+    try:
+        # Process all files in this directory first
+        for entry in files:
+            # Generate the new file name
+            new_name = standardize_name(entry.name)
+            
+            # Get a unique name if there would be a naming conflict
+            if entry.name.lower() != new_name.lower():  # Case-insensitive comparison
+                release_name(entry.name, existing_names)
+                new_name = get_unique_name(new_name, existing_names)
+                submit_rename(entry, new_name, "Renamed")
         
-        # Get a unique path if there would be a naming conflict
-        if old_path.lower() != new_path.lower():  # Case-insensitive comparison
-            new_path = get_unique_path(new_path)
-            os.rename(old_path, new_path)
-            print(f"Renamed: {old_path} -> {new_path}")
-    
-    # Process directories from deepest to shallowest
-    for root, dir_name in reversed(all_dirs):
-        # Standardize the directory name
-        new_dir_name = standardize_name(dir_name)
-        old_dir_path = os.path.join(root, dir_name)
-        new_dir_path = os.path.join(root, new_dir_name)
+        # Then process the subdirectories, whose contents are already done
+        for entry in dirs:
+            # Standardize the directory name
+            new_dir_name = standardize_name(entry.name)
+            
+            # Get a unique name if there would be a naming conflict
+            if entry.name.lower() != new_dir_name.lower():  # Case-insensitive comparison
+                release_name(entry.name, existing_names)
+                new_dir_name = get_unique_name(new_dir_name, existing_names)
+                submit_rename(entry, new_dir_name, "Renamed Directory")
         
-        # Get a unique path if there would be a naming conflict
-        if old_dir_path.lower() != new_dir_path.lower():  # Case-insensitive comparison
-            new_dir_path = get_unique_path(new_dir_path)
-            os.rename(old_dir_path, new_dir_path)
-            print(f"Renamed Directory: {old_dir_path} -> {new_dir_path}")
+        # Wait for this directory before moving up to its parent
+        for future, message in submitted:
+            future.result()
+            output_lines.append(message)
+    finally:
+        # Make sure nothing is still using the descriptor before closing it
+        concurrent.futures.wait([future for future, _ in submitted])
+        if dir_fd is not None:
+            os.close(dir_fd)
+
+def rename_files_recursive(directory):
+    """
+    Recursively rename files in the directory and subdirectories.
+    
+    Renames within a directory are dispatched to a thread pool since they are
+    bound by filesystem latency rather than Python work. Rename messages are
+    buffered and written to stdout in batches.
+    """
+    # First collect all entries to avoid modification during iteration
+    all_directories = collect_directories(directory)
+    
+    # Renames are I/O-bound, so use more workers than CPUs
+    max_workers = (os.cpu_count() or 1) * 4
+    # Rename messages waiting to be written
+    output_lines = []
+    
+    try:
+        with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as pool:
+            # Process directories from deepest to shallowest so a directory is only
+            # renamed after everything inside it has been handled
+            for root, entries in reversed(all_directories):
+                rename_directory_entries(pool, root, entries, output_lines)
+                if len(output_lines) >= OUTPUT_BATCH_SIZE:
+                    write_lines(output_lines)
+    finally:
+        # Report whatever was renamed, even if a rename failed partway through
+        write_lines(output_lines)
+        sys.stdout.flush()
 
 # Specify the root directory to start renaming
 if __name__ == "__main__":
@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""
+Test script for the naming conflict handling in rename_files.py.
+"""
+
+import contextlib
+import io
+import logging
+import os
+import tempfile
+from rename_files import rename_files_recursive
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, 
+                    format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+def test_case_only_sibling_is_kept():
+    """Test that renaming an entry away does not free a name its case-only sibling still uses."""
+    with tempfile.TemporaryDirectory() as directory:
+        # 'aB' becomes 'a_b' and 'a!b' becomes 'ab', which 'ab' still holds
+        for name, content in (("aB", "MOVE"), ("ab", "KEEP"), ("a!b", "OTHER")):
+            with open(os.path.join(directory, name), "w") as f:
+                f.write(content)
+        
+        # Keep the rename messages out of the test output
+        with contextlib.redirect_stdout(io.StringIO()):
+            rename_files_recursive(directory)
+        
+        contents = {}
+        for name in os.listdir(directory):
+            with open(os.path.join(directory, name)) as f:
+                contents[name] = f.read()
+        
+        # Verify the expected files
+        expected = {"a_b": "MOVE", "ab": "KEEP", "ab_1": "OTHER"}
+        if contents == expected:
+            logger.info("✅ Test passed: No file was overwritten")
+            return True
+        logger.error(f"❌ Test failed: Expected {expected}, got {contents}")
+        return False
+
+if __name__ == "__main__":
+    logger.info("Testing rename conflict handling...")
+    
+    # Run the tests
+    if test_case_only_sibling_is_kept():
+        logger.info("✅ All tests passed!")
+    else:
+        logger.error("❌ Some tests failed!")
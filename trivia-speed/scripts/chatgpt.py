@@ -7,19 +7,20 @@ to analyze trivia questions from images.
 """
 
 import asyncio
-import concurrent.futures
-import functools
 import logging
 import os
 import time
+from types import SimpleNamespace
 from typing import Optional
 
+import httpx
+import orjson
 from dotenv import load_dotenv
-from openai import AsyncOpenAI
+from openai import APITimeoutError, AsyncOpenAI, DefaultAsyncHttpxClient
 from PIL import Image
 from pydantic import BaseModel
 # Import screenshot module for image preparation
-from screenshot import prepare_image_for_api
+from screenshot import IMAGE_MIME_TYPES, prepare_image_for_api
 
 # Configure logging
 logger = logging.getLogger('trivia-speed')
@@ -33,6 +34,12 @@ OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 MODEL = "gpt-4o"
 MAX_TOKENS = int(os.getenv("MAX_TOKENS", "200"))  # Reduced token count for faster response
 API_TIMEOUT = int(os.getenv("API_TIMEOUT", "15"))  # Timeout for API calls in seconds
+# GPT-4o tiles images at 768px on the short side, so larger uploads only add bytes
+IMAGE_MAX_DIMENSION = 1024
+IMAGE_QUALITY = 70
+# Upload format: JPEG encodes fastest, WEBP is smaller on the wire but slower to encode
+IMAGE_FORMAT = os.getenv("IMAGE_FORMAT", "JPEG").upper()
+IMAGE_MIME_TYPE = IMAGE_MIME_TYPES[IMAGE_FORMAT]
 
 # Do not change the system prompt - this is for the AI
 SYSTEM_PROMPT = """
@@ -59,65 +66,106 @@ class TriviaAnalysis(BaseModel):
     rationale: str
     answer: str
 
-# Create a single OpenAI client instance to reuse
-client = AsyncOpenAI(api_key=OPENAI_API_KEY, timeout=API_TIMEOUT)
+# Structured output format, generated from the Pydantic model once at import time
+# so the SDK does not rebuild the JSON schema on every request
+RESPONSE_FORMAT = {
+    "type": "json_schema",
+    "json_schema": {
+        "name": "TriviaAnalysis",
+        "schema": {
+            **TriviaAnalysis.model_json_schema(),
+            "additionalProperties": False  # Required by strict mode
+        },
+        "strict": True
+    }
+}
+
+# Static message parts, shared by every request (the SDK does not mutate them)
+SYSTEM_MESSAGE = {
+    "role": "system",
+    "content": SYSTEM_PROMPT
+}
+USER_TEXT_PART = {
+    "type": "text",
+    "text": "Analyze this trivia question."
+}
 
-# Thread pool for CPU-bound tasks
-thread_pool = concurrent.futures.ThreadPoolExecutor(max_workers=4)
+# Static part of every API request, built once at import time
+REQUEST_TEMPLATE = {
+    "model": MODEL,
+    "max_tokens": MAX_TOKENS,
+    "temperature": 0.1,  # Lower temperature for more deterministic responses
+    "response_format": RESPONSE_FORMAT
+}
 
-def prepare_api_request(image):
+class OrjsonHttpxClient(DefaultAsyncHttpxClient):
+    """httpx client that serializes JSON request bodies with orjson.
+    
+    The request body carries the whole base64 image, which the stdlib json
+    encoder escapes noticeably slower than orjson.
+    """
+    
+    def build_request(self, method, url, *, json=None, content=None, headers=None, **kwargs):
+        if json is not None and content is None:
+            content = orjson.dumps(json)
+            headers = httpx.Headers(headers)
+            if "content-type" not in headers:
+                headers["Content-Type"] = "application/json"
+            json = None
+        return super().build_request(method, url, json=json, content=content, headers=headers, **kwargs)
+
+# Create a single OpenAI client instance to reuse. The timeout is passed per request
+# so the client and its connection pool live for the whole process, and retries are
+# disabled so API_TIMEOUT stays the upper bound on a call.
+client = AsyncOpenAI(
+    api_key=OPENAI_API_KEY,
+    timeout=API_TIMEOUT,
+    max_retries=0,
+    http_client=OrjsonHttpxClient()
+)
+
+def prepare_api_request(base64_image):
     """
     Prepare the API request payload for GPT-4o.
     
     Args:
-        image (PIL.Image): The image to analyze
+        base64_image (str): The base64 encoded image to analyze, in IMAGE_FORMAT
         
     Returns:
         dict: The API request payload
     """
-    # Encode the image to base64
-    base64_image = prepare_image_for_api(image)
-    
-    system_content = SYSTEM_PROMPT
-    response_format = TriviaAnalysis
-    
+    # Only the image part changes between calls; the rest is shared by reference
     request = {
-        "model": MODEL,
+        **REQUEST_TEMPLATE,
         "messages": [
-            {
-                "role": "system",
-                "content": system_content
-            },
+            SYSTEM_MESSAGE,
             {
                 "role": "user",
                 "content": [
-                    {
-                        "type": "text",
-                        "text": "Analyze this trivia question."
-                    },
+                    USER_TEXT_PART,
                     {
                         "type": "image_url",
                         "image_url": {
-                            "url": f"data:image/jpeg;base64,{base64_image}"
+                            "url": f"data:{IMAGE_MIME_TYPE};base64,{base64_image}"
                         }
                     }
                 ]
             }
-        ],
-        "max_tokens": MAX_TOKENS,
-        "temperature": 0.1,  # Lower temperature for more deterministic responses
-        "response_format": response_format
+        ]
     }
     
     return request
 
-async def analyze_trivia_with_gpt4o(image, debug=False):
+async def analyze_trivia_with_gpt4o(image, debug=False, validate=True):
     """
     Send the image to GPT-4o for analysis using Pydantic model for structured output.
     
     Args:
         image (PIL.Image): The image to analyze
         debug (bool, optional): Whether to print debug information.
+        validate (bool, optional): Whether to validate the response with Pydantic.
+            When False, the JSON is parsed directly into a SimpleNamespace with the
+            same fields, skipping the validation cost. Defaults to True.
         
     Returns:
         TriviaAnalysis: The parsed response from GPT-4o with rationale and answer
@@ -129,44 +177,42 @@ async def analyze_trivia_with_gpt4o(image, debug=False):
         logger.info("Sending image to GPT-4o for analysis...")
     start_time = time.time()
     
-    # Prepare the API request in a separate thread to avoid blocking
-    loop = asyncio.get_event_loop()
+    # Only the JPEG encode is worth moving off the event loop; the dict build is trivial
     try:
-        request = await loop.run_in_executor(
-            thread_pool, 
-            functools.partial(prepare_api_request, image)
+        base64_image = await asyncio.to_thread(
+            prepare_image_for_api, image, IMAGE_QUALITY, IMAGE_MAX_DIMENSION, IMAGE_FORMAT
         )
+        request = prepare_api_request(base64_image)
         
-        # Call the OpenAI API with parse method and timeout
+        # Call the OpenAI API with timeout
         try:
-            response = await asyncio.wait_for(
-                client.beta.chat.completions.parse(**request),
-                timeout=API_TIMEOUT
-            )
+            response = await client.chat.completions.create(**request, timeout=API_TIMEOUT)
             
             if debug:
                 elapsed = time.time() - start_time
                 logger.info(f"GPT-4o response received in {elapsed:.3f} seconds")
             
-            # Return the parsed model directly
-            return response.choices[0].message.parsed
-        except asyncio.TimeoutError:
+            content = response.choices[0].message.content
+            if not validate:
+                # Strict structured outputs already guarantee the schema
+                return SimpleNamespace(**orjson.loads(content))
+            
+            # Validate the structured JSON content against the model
+            return TriviaAnalysis.model_validate_json(content)
+        except APITimeoutError:
             logger.error(f"API request timed out after {API_TIMEOUT} seconds")
             raise TimeoutError(f"GPT-4o API request timed out after {API_TIMEOUT} seconds")
         except Exception as e:
             logger.error(f"Error processing GPT-4o response: {e}")
             raise ValueError(f"Failed to process GPT-4o response: {e}")
+    except TimeoutError:
+        # Let timeouts reach the caller as timeouts
+        raise
     except Exception as e:
         logger.error(f"Error preparing API request: {e}")
         raise ValueError(f"Failed to prepare API request: {e}")
 
-def shutdown():
-    """Shutdown the thread pool"""
-    thread_pool.shutdown(wait=False)
-
 def set_api_timeout(timeout):
     """Set the API timeout value"""
     global API_TIMEOUT
-    API_TIMEOUT = timeout
-    # Update the client timeout as well
-    client.timeout = timeout 
\ No newline at end of file
+    API_TIMEOUT = timeout 
\ No newline at end of file
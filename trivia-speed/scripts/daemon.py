@@ -0,0 +1,255 @@
+#!/usr/bin/env python3
+"""
+Background server for Trivia Speed Assistant.
+
+Importing the provider SDKs and building their clients takes most of a second,
+which is paid on every hotkey press when main.py runs as a one-shot CLI. This
+module lets a long-running process keep those clients warm and serve runs over
+a Unix socket, while the CLI only forwards its arguments and prints the output.
+
+Only the standard library is imported here so the client side stays cheap.
+"""
+
+import asyncio
+import contextlib
+import io
+import json
+import logging
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+from pathlib import Path
+
+# Configure logging
+logger = logging.getLogger('trivia-speed')
+
+# Socket the server listens on, private to the current user
+SOCKET_PATH = os.getenv("TRIVIA_SPEED_SOCKET") or str(
+    Path(tempfile.gettempdir()) / f"trivia-speed-{os.getuid() if hasattr(os, 'getuid') else 0}.sock"
+)
+# Size of the chunks read from the socket by the client
+CLIENT_READ_SIZE = 65536
+# Sent by the client after its request to stop the run early (on Ctrl-C)
+CANCEL_MESSAGE = b"CANCEL\n"
+
+class StreamForwarder(io.TextIOBase):
+    """Text stream that forwards everything written to it to a socket writer.
+    
+    Used as stdout/stderr while a request is being handled, so the existing
+    print() calls reach the client unchanged.
+    """
+    
+    def __init__(self, writer):
+        self.writer = writer
+        # Created inside handle_client, so this is the loop that owns the writer
+        self.loop = asyncio.get_running_loop()
+        self.loop_thread = threading.get_ident()
+    
+    def writable(self):
+        return True
+    
+    def write(self, text):
+        data = text.encode("utf-8")
+        if threading.get_ident() == self.loop_thread:
+            self.send(data)
+        else:
+            # Logging from executor threads (e.g. background saves under --debug)
+            # must not touch the transport off the event loop thread
+            try:
+                self.loop.call_soon_threadsafe(self.send, data)
+            except RuntimeError:
+                # The loop has already closed, so there is no client to send to
+                pass
+        return len(text)
+    
+    def send(self, data):
+        # StreamWriter.write only buffers, so this never blocks the event loop
+        if not self.writer.is_closing():
+            self.writer.write(data)
+
+def is_supported():
+    """
+    Check whether the daemon can run on this platform.
+    
+    Returns:
+        bool: True if Unix domain sockets are available
+    """
+    return hasattr(socket, "AF_UNIX")
+
+def is_running():
+    """
+    Check whether a server is accepting connections on SOCKET_PATH.
+    
+    Returns:
+        bool: True if a server is running
+    """
+    if not is_supported():
+        return False
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        try:
+            sock.connect(SOCKET_PATH)
+        except OSError:
+            return False
+    return True
+
+async def serve(run_request):
+    """
+    Serve requests on SOCKET_PATH until cancelled.
+    
+    Requests are handled one at a time, since a run shares module state
+    (stdout, logging level, timeouts) with the rest of the process.
+    
+    Args:
+        run_request: Coroutine function called with each request dict. Anything
+            it prints is sent back to the client.
+    """
+    lock = asyncio.Lock()
+    
+    async def run_guarded(request):
+        try:
+            await run_request(request)
+        except SystemExit:
+            # argparse exits on --help and invalid arguments. Inside a task this
+            # would otherwise stop the whole server's event loop
+            pass
+    
+    async def handle_client(reader, writer):
+        line = await reader.readline()
+        if not line:
+            # A bare connect, e.g. from is_running()
+            writer.close()
+            return
+        try:
+            request = json.loads(line)
+        except ValueError as e:
+            logger.error(f"Invalid daemon request: {e}")
+            writer.close()
+            return
+        
+        async with lock:
+            forwarder = StreamForwarder(writer)
+            # Send logs to the client too, and keep them out of the server's terminal
+            log_handler = logging.StreamHandler(forwarder)
+            log_handler.setFormatter(logging.Formatter(
+                '%(asctime)s - %(levelname)s - %(message)s',
+                datefmt='%Y-%m-%d %H:%M:%S'
+            ))
+            logger.addHandler(log_handler)
+            logger.propagate = False
+            # Cancel the run if the client sends CANCEL_MESSAGE or hangs up
+            run_task = None
+            cancel_task = asyncio.create_task(reader.readline())
+            try:
+                with contextlib.redirect_stdout(forwarder), contextlib.redirect_stderr(forwarder):
+                    run_task = asyncio.create_task(run_guarded(request))
+                    done, _ = await asyncio.wait({run_task, cancel_task}, return_when=asyncio.FIRST_COMPLETED)
+                    if run_task not in done:
+                        logger.info("Client cancelled the request")
+                        run_task.cancel()
+                    try:
+                        await run_task
+                    except asyncio.CancelledError:
+                        # Only swallow the cancellation we asked for
+                        if not cancel_task.done():
+                            raise
+            except Exception as e:
+                logger.error(f"Error handling daemon request: {e}")
+            finally:
+                cancel_task.cancel()
+                if run_task is not None:
+                    run_task.cancel()
+                logger.removeHandler(log_handler)
+                logger.propagate = True
+        
+        try:
+            await writer.drain()
+            writer.close()
+            await writer.wait_closed()
+        except ConnectionError:
+            # The client went away before reading everything
+            pass
+    
+    if is_running():
+        raise RuntimeError(f"A server is already listening on {SOCKET_PATH}")
+    
+    # Remove a socket left behind by a previous server that didn't exit cleanly
+    with contextlib.suppress(FileNotFoundError):
+        os.unlink(SOCKET_PATH)
+    
+    # Create the socket owner-only from the start, so no other user can connect
+    # between the bind and a later chmod
+    old_umask = os.umask(0o177)
+    try:
+        server = await asyncio.start_unix_server(handle_client, path=SOCKET_PATH)
+    finally:
+        os.umask(old_umask)
+    print(f"Trivia Speed server listening on {SOCKET_PATH}")
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        with contextlib.suppress(FileNotFoundError):
+            os.unlink(SOCKET_PATH)
+
+def send_request(request):
+    """
+    Send a request to a running server and copy its output to stdout.
+    
+    Args:
+        request (dict): The request to send, serializable to JSON
+    
+    Returns:
+        bool: True if a server handled the request, False if none is running
+    """
+    if not is_supported():
+        return False
+    
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        try:
+            sock.connect(SOCKET_PATH)
+        except (FileNotFoundError, ConnectionRefusedError):
+            return False
+        
+        # The write side stays open: closing it would tell the server to cancel
+        sock.sendall(json.dumps(request).encode("utf-8") + b"\n")
+        
+        # Print output as it arrives so fast answers aren't held back by slow ones
+        stdout = getattr(sys.stdout, "buffer", None)
+        try:
+            while True:
+                chunk = sock.recv(CLIENT_READ_SIZE)
+                if not chunk:
+                    break
+                if stdout is not None:
+                    stdout.write(chunk)
+                    stdout.flush()
+                else:
+                    sys.stdout.write(chunk.decode("utf-8", errors="replace"))
+                    sys.stdout.flush()
+        except KeyboardInterrupt:
+            # Stop the provider calls instead of letting the server finish the run
+            with contextlib.suppress(OSError):
+                sock.sendall(CANCEL_MESSAGE)
+            raise
+        return True
+    finally:
+        sock.close()
+
+def spawn_server(command):
+    """
+    Start a server in the background, detached from this process and terminal.
+    
+    Args:
+        command (list): The command line that runs the server
+    """
+    subprocess.Popen(
+        command,
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        start_new_session=True
+    )
@@ -0,0 +1,39 @@
+#!/usr/bin/env python3
+"""
+Thread pools shared by all Trivia Speed modules.
+
+The screenshot and provider modules each used to create their own pool, so a
+run could end up with a dozen threads for a single screenshot. They all submit
+their blocking work (image encodes, request building) here instead, and main.py
+makes it the event loop's default executor so run_in_executor(None, ...) and
+asyncio.to_thread use it too.
+
+Screenshot saves get a small pool of their own, so shutdown() can wait for
+them while dropping provider work that is still queued.
+
+Only the standard library is imported here so it stays cheap to import.
+"""
+
+import concurrent.futures
+import os
+
+# Enough workers for every provider's encode plus a capture at once
+MAX_WORKERS = min(8, (os.cpu_count() or 4) * 2)
+
+# Thread pool for CPU-bound and blocking tasks
+thread_pool = concurrent.futures.ThreadPoolExecutor(
+    max_workers=MAX_WORKERS,
+    thread_name_prefix="trivia-speed"
+)
+
+# Thread pool for background screenshot saves, which must finish before exit
+save_pool = concurrent.futures.ThreadPoolExecutor(
+    max_workers=2,
+    thread_name_prefix="trivia-speed-save"
+)
+
+def shutdown():
+    """Shutdown the thread pools, waiting only for pending screenshot saves"""
+    # Queued request building and encodes are useless once the run is over
+    thread_pool.shutdown(wait=False, cancel_futures=True)
+    save_pool.shutdown(wait=True)
@@ -8,51 +8,42 @@ It can also use Gemini 2.0 for OCR to extract text from the image and Perplexity
 """
 
 import os
+import sys
 import argparse
+import functools
+import hashlib
+import json
+from collections import OrderedDict
+from dataclasses import dataclass, fields
 from datetime import datetime
 import asyncio
 from dotenv import load_dotenv
 from pathlib import Path
 import logging
-from PIL import Image
+import socket
+import threading
 
-# Import screenshot module
-from screenshot import (
-    take_right_third_screenshot,
-    shutdown as screenshot_shutdown
-)
+# uvloop is a faster drop-in event loop; it isn't available on Windows
+try:
+    import uvloop
+except ImportError:
+    uvloop = None
 
-# Import chatgpt module
-from chatgpt import (
-    analyze_trivia_with_gpt4o,
-    TriviaAnalysis as GPTTriviaAnalysis,
-    set_api_timeout as set_gpt_api_timeout,
-    shutdown as chatgpt_shutdown
-)
+# Import the background server, used by --serve and to forward runs to it
+import daemon
+# Import the thread pool shared by every module
+import executors
 
-# Import mistral module
-from mistral import (
-    analyze_trivia_with_mistral,
-    TriviaAnalysis as MistralTriviaAnalysis,
-    set_api_timeout as set_mistral_api_timeout,
-    shutdown as mistral_shutdown
-)
+# The screenshot and provider modules pull in PIL and the API SDKs, which take
+# most of a second to import. They are imported on first use instead, so runs
+# that skip a provider (e.g. --only-sonar) or that are forwarded to a background
+# server don't pay for SDKs they never touch.
 
-# Import Gemini OCR module
-from ocr_and_gemini import (
-    extract_text_with_gemini,
-    OCRResult,
-    set_api_timeout as set_gemini_api_timeout,
-    shutdown as gemini_shutdown
-)
-
-# Import Perplexity module
-from perplexity import (
-    analyze_trivia_with_perplexity,
-    TriviaAnalysis as PerplexityTriviaAnalysis,
-    set_api_timeout as set_perplexity_api_timeout,
-    shutdown as perplexity_shutdown
-)
+# API hosts of each provider, resolved ahead of time by prefetch_dns()
+OPENAI_HOST = "api.openai.com"
+MISTRAL_HOST = "api.mistral.ai"
+GEMINI_HOST = "generativelanguage.googleapis.com"
+PERPLEXITY_HOST = "api.perplexity.ai"
 
 # Configure logging
 logging.basicConfig(
@@ -65,22 +56,283 @@ logger = logging.getLogger('trivia-speed')
 # Load environment variables from .env file
 load_dotenv()
 
-# Default API timeout
-API_TIMEOUT = int(os.getenv("API_TIMEOUT", "15"))  # Timeout for API calls in seconds
+@dataclass
+class TimeoutConfig:
+    """Per-provider API timeouts in seconds"""
+    gpt: float = 8
+    mistral: float = 10
+    gemini_ocr: float = 12
+    sonar: float = 15
+    sonar_pro: float = 20
+    sonar_reasoning: float = 30
+    
+    @classmethod
+    def from_env(cls):
+        """
+        Load timeouts from environment variables.
+        
+        Each provider reads <NAME>_API_TIMEOUT (e.g. SONAR_PRO_API_TIMEOUT). If that is
+        not set, API_TIMEOUT applies to every provider, then the built-in default.
+        
+        Returns:
+            TimeoutConfig: The loaded timeouts
+        """
+        shared = os.getenv("API_TIMEOUT")
+        values = {}
+        for field in fields(cls):
+            value = os.getenv(f"{field.name.upper()}_API_TIMEOUT", shared)
+            if value is not None:
+                values[field.name] = float(value)
+        return cls(**values)
+    
+    def for_perplexity(self, model):
+        """
+        Get the timeout for a Perplexity model.
+        
+        Args:
+            model (str): The Perplexity model name, e.g. "sonar-pro"
+            
+        Returns:
+            float: The timeout in seconds
+        """
+        return getattr(self, model.replace("-", "_"))
+
+# API timeouts, updated from the command line in main()
+TIMEOUTS = TimeoutConfig.from_env()
+
+def load_chatgpt():
+    """Import the GPT-4o module and apply its timeout"""
+    import chatgpt
+    chatgpt.set_api_timeout(TIMEOUTS.gpt)
+    return chatgpt
+
+def load_mistral():
+    """Import the Mistral module and apply its timeout"""
+    import mistral
+    mistral.set_api_timeout(TIMEOUTS.mistral)
+    return mistral
+
+def load_gemini():
+    """Import the Gemini OCR module and apply its timeout"""
+    import ocr_and_gemini
+    ocr_and_gemini.set_api_timeout(TIMEOUTS.gemini_ocr)
+    return ocr_and_gemini
+
+def load_perplexity():
+    """Import the Perplexity module and apply its timeout"""
+    import perplexity
+    # The Perplexity module shares one timeout across models, so give it the
+    # longest and let run_with_timeout enforce each model's own limit
+    perplexity.set_api_timeout(max(TIMEOUTS.sonar, TIMEOUTS.sonar_pro, TIMEOUTS.sonar_reasoning))
+    return perplexity
+
+def load_screenshot():
+    """Import the screenshot module, which loads mss and Pillow"""
+    import screenshot
+    return screenshot
+
+def load_all_providers():
+    """Import every provider module up front, for the long-running server"""
+    load_chatgpt()
+    load_mistral()
+    load_gemini()
+    load_perplexity()
+    load_screenshot()
+
+def load_enabled_providers(args):
+    """
+    Import the provider modules a run is going to use.
+    
+    Args:
+        args: Parsed command line arguments, after the --only-sonar* flags are applied
+    """
+    if not args.no_gpt:
+        load_chatgpt()
+    if not args.no_mistral:
+        load_mistral()
+    if not args.no_gemini_ocr:
+        load_gemini()
+    if args.speculative_sonar or not (args.no_gemini_ocr or (args.no_sonar and args.no_sonar_pro and args.no_sonar_reasoning)):
+        load_perplexity()
+
+async def close_sessions():
+    """Close HTTP sessions tied to the running event loop"""
+    perplexity = sys.modules.get("perplexity")
+    if perplexity is not None:
+        await perplexity.close_session()
+
+def use_shared_executor():
+    """
+    Make the shared thread pool the running event loop's default executor.
+    
+    asyncio.run() shuts the default executor down when it returns, so this is
+    only called from the single top-level coroutine of a process.
+    """
+    asyncio.get_running_loop().set_default_executor(executors.thread_pool)
 
 # Create screenshots directory path once
 SCRIPT_DIR = Path(__file__).parent.absolute()
 SCREENSHOTS_DIR = SCRIPT_DIR / ".." / "screenshots"
 SCREENSHOTS_DIR.mkdir(exist_ok=True)
 
-# Global OCR result to share between Perplexity and other models
-ocr_result = None
+# Persistent OCR cache so re-captures of the same screen skip the Gemini call
+OCR_CACHE_PATH = SCREENSHOTS_DIR / ".ocr_cache.json"
+OCR_CACHE_SIZE = int(os.getenv("OCR_CACHE_SIZE", "256"))  # Maximum number of cached OCR results
+
+
+def emit(*lines):
+    """
+    Print an answer block with a single write.
+    
+    print() issues separate writes for each line and its newline; a single write
+    keeps a block together when several providers finish at once and costs one
+    flush on a line-buffered terminal.
+    
+    Args:
+        *lines: The lines to print
+    """
+    sys.stdout.write("\n".join(lines) + "\n")
+
+async def run_with_timeout(coro, timeout):
+    """
+    Await a coroutine, cancelling it if it takes longer than the timeout.
+    
+    This guarantees the deadline even if the underlying client ignores its own timeout.
+    
+    Args:
+        coro: The coroutine to await
+        timeout (float): The timeout in seconds
+        
+    Returns:
+        The coroutine's result
+    """
+    try:
+        return await asyncio.wait_for(coro, timeout=timeout)
+    except asyncio.TimeoutError:
+        raise TimeoutError(f"Request timed out after {timeout} seconds")
+
+def load_image(path):
+    """
+    Open an image file and decode it fully.
+    
+    PIL decodes lazily, so loading here keeps the decode in the calling thread
+    instead of on whichever coroutine first touches the pixels.
+    
+    Args:
+        path (str): Path to the image file
+        
+    Returns:
+        PIL.Image: The loaded image
+    """
+    from PIL import Image
+    image = Image.open(path)
+    image.load()
+    return image
+
+def load_ocr_cache():
+    """
+    Load the OCR cache from disk.
+    
+    Returns:
+        OrderedDict: Cached OCR results keyed by image hash, oldest first
+    """
+    try:
+        with open(OCR_CACHE_PATH, "r", encoding="utf-8") as f:
+            return OrderedDict(json.load(f))
+    except (OSError, ValueError):
+        # Missing or corrupt cache, start empty
+        return OrderedDict()
+
+def save_ocr_cache():
+    """
+    Write the OCR cache to disk if it changed during this run.
+    
+    Entries another process saved since this one started are merged in rather
+    than overwritten, so concurrent or back-to-back runs all share one cache.
+    """
+    global ocr_cache_dirty
+    if not ocr_cache_dirty:
+        return
+    try:
+        # Ours go last, marking them as the most recently used
+        merged = load_ocr_cache()
+        for key, value in ocr_cache.items():
+            merged.pop(key, None)
+            merged[key] = value
+        while len(merged) > OCR_CACHE_SIZE:
+            merged.popitem(last=False)
+        ocr_cache.clear()
+        ocr_cache.update(merged)
+        
+        # Write to a per-process temporary file first so a crash can't leave a
+        # truncated cache and concurrent saves don't clobber each other's file
+        temp_path = OCR_CACHE_PATH.with_suffix(f".{os.getpid()}.tmp")
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(ocr_cache, f)
+        os.replace(temp_path, OCR_CACHE_PATH)
+        ocr_cache_dirty = False
+    except OSError as e:
+        logger.warning(f"Failed to save OCR cache: {e}")
+
+def hash_image(image):
+    """
+    Compute a cache key for an image from its raw pixel data.
+    
+    Args:
+        image (PIL.Image): The image to hash
+        
+    Returns:
+        str: Hex digest identifying the image contents
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    # Include the mode and size so identical bytes with a different shape don't collide
+    digest.update(f"{image.mode}:{image.size}".encode())
+    digest.update(image.tobytes())
+    return digest.hexdigest()
+
+# Load the OCR cache once at startup
+ocr_cache = load_ocr_cache()
+ocr_cache_dirty = False
+
+class AnswerTally:
+    """Counts the answers printed so far and signals once enough of them agree"""
+    
+    def __init__(self, required):
+        """
+        Args:
+            required (int): How many providers must give the same answer
+        """
+        self.required = required
+        self.counts = {}
+        self.agreed = asyncio.Event()
+    
+    def record(self, answer):
+        """
+        Record one provider's answer.
+        
+        Args:
+            answer (str): The answer as printed
+        """
+        # Answers are compared loosely, since models differ in case and spacing
+        key = " ".join(str(answer).split()).casefold()
+        self.counts[key] = self.counts.get(key, 0) + 1
+        if self.counts[key] >= self.required:
+            self.agreed.set()
+
+# Tally for the current run when --agree is used, otherwise None
+answer_tally = None
+
+def record_answer(answer):
+    """Record a printed answer in the current run's tally, if there is one"""
+    if answer_tally is not None:
+        answer_tally.record(answer)
 
 async def process_with_gpt(image, args):
     """Process the image with GPT-4o"""
     try:
         # Use structured output with Pydantic model
-        result = await analyze_trivia_with_gpt4o(image, args.debug)
+        chatgpt = load_chatgpt()
+        result = await run_with_timeout(chatgpt.analyze_trivia_with_gpt4o(image, args.debug, validate=args.debug), TIMEOUTS.gpt)
         
         if args.debug:
             logger.info("\n=== GPT-4o Analysis ===")
@@ -89,12 +341,13 @@ async def process_with_gpt(image, args):
             logger.info("==========================\n")
         else:
             # In non-debug mode, only print the answer with a newline before
-            print(f"\n{result.answer}")
+            emit(f"\n{result.answer}")
+        record_answer(result.answer)
             
     except TimeoutError as e:
         logger.error(f"GPT-4o API request timed out: {e}")
         if args.debug:
-            print(f"Error: GPT-4o API request timed out after {API_TIMEOUT} seconds")
+            print(f"Error: GPT-4o API request timed out after {TIMEOUTS.gpt} seconds")
         else:
             print("Error: GPT-4o API request timed out")
     except Exception as e:
@@ -108,7 +361,8 @@ async def process_with_mistral(image, args):
     """Process the image with Mistral AI"""
     try:
         # Always use structured output with Pydantic model
-        result = await analyze_trivia_with_mistral(image, args.debug)
+        mistral = load_mistral()
+        result = await run_with_timeout(mistral.analyze_trivia_with_mistral(image, args.debug, validate=args.debug), TIMEOUTS.mistral)
         
         if args.debug:
             logger.info("\n=== Mistral Analysis ===")
@@ -117,12 +371,13 @@ async def process_with_mistral(image, args):
             logger.info("==========================\n")
         else:
             # In non-debug mode, only print the answer with a newline before
-            print(f"\n\033[38;5;208m{result.answer}\033[0m")
+            emit(f"\n\033[38;5;208m{result.answer}\033[0m")
+        record_answer(result.answer)
             
     except TimeoutError as e:
         logger.error(f"Mistral API request timed out: {e}")
         if args.debug:
-            print(f"Error: Mistral API request timed out after {API_TIMEOUT} seconds")
+            print(f"Error: Mistral API request timed out after {TIMEOUTS.mistral} seconds")
         else:
             print("Error: Mistral API request timed out")
     except Exception as e:
@@ -132,48 +387,62 @@ async def process_with_mistral(image, args):
         else:
             print("Error: Failed to analyze trivia with Mistral")
 
-async def process_with_perplexity(ocr_result, args, model="sonar-pro"):
+async def process_with_perplexity(ocr_result, args, model="sonar-pro", analysis=None):
     """Process the OCR result with Perplexity AI
     
     Args:
         ocr_result: The OCR result containing question and options
         args: Command line arguments
         model (str, optional): The Perplexity model to use. Defaults to "sonar-pro".
+        analysis (optional): An awaitable that produces the result, used instead of
+            sending ocr_result (e.g. the speculative image-based request). Defaults to None.
     """
     try:
-        if args.debug:
-            logger.info(f"Sending OCR result to Perplexity for analysis using model: {model}...")
-            print(f"Sending OCR result to Perplexity for analysis using model: {model}...")
+        if analysis is None:
+            if args.debug:
+                logger.info(f"Sending OCR result to Perplexity for analysis using model: {model}...")
+                print(f"Sending OCR result to Perplexity for analysis using model: {model}...")
+            
+            # Send OCR result to Perplexity
+            perplexity = load_perplexity()
+            analysis = run_with_timeout(
+                perplexity.analyze_trivia_with_perplexity(ocr_result, args.debug, model, validate=args.debug),
+                TIMEOUTS.for_perplexity(model)
+            )
         
-        # Send OCR result to Perplexity
-        perplexity_result = await analyze_trivia_with_perplexity(ocr_result, args.debug, model)
+        perplexity_result = await analysis
         
         # Check if we got a valid result
         if perplexity_result is None:
             if args.debug:
-                print(f"\nError: Failed to get response from Perplexity ({model})")
+                emit(f"\nError: Failed to get response from Perplexity ({model})")
             else:
-                print(f"\n\033[31mError: Failed to get response from Perplexity ({model})\033[0m")
+                emit(f"\n\033[31mError: Failed to get response from Perplexity ({model})\033[0m")
             return None
         
         # Print the result
         if args.debug:
-            print(f"\n--- Perplexity AI Analysis ({model}) ---")
-            print(f"Answer: {perplexity_result.answer}")
-            print(f"Rationale: {perplexity_result.rationale}")
+            emit(
+                f"\n--- Perplexity AI Analysis ({model}) ---",
+                f"Answer: {perplexity_result.answer}",
+                f"Rationale: {perplexity_result.rationale}"
+            )
         else:
             if model == "sonar":
-                print(f"\n\033[38;5;{27}m[Sonar] {perplexity_result.answer}\033[0m")  # lighter blue
+                emit(f"\n\033[38;5;{27}m[Sonar] {perplexity_result.answer}\033[0m")  # lighter blue
             elif model == "sonar-pro":
-                print(f"\n\033[38;5;{40}m[Sonar Pro] {perplexity_result.answer}\033[0m")  # medium blue
+                emit(f"\n\033[38;5;{40}m[Sonar Pro] {perplexity_result.answer}\033[0m")  # medium blue
             else: # sonar-reasoning
-                print(f"\n\033[38;5;{75}m[Sonar Reasoning] {perplexity_result.answer}\033[0m")  # light blue
+                emit(f"\n\033[38;5;{75}m[Sonar Reasoning] {perplexity_result.answer}\033[0m")  # light blue
         
+        # The Perplexity module reports failures as "Error (...)" answers
+        if not perplexity_result.answer.startswith("Error ("):
+            record_answer(perplexity_result.answer)
         return perplexity_result
     except TimeoutError as e:
         logger.error(f"Perplexity API request timed out: {e}")
         if args.debug:
-            print(f"Error: Perplexity API request timed out after {API_TIMEOUT} seconds")
+            print(f"Error: Perplexity API request timed out after {TIMEOUTS.for_perplexity(model)} seconds")
         else:
             print(f"Error: Perplexity API request timed out for model {model}")
     except Exception as e:
@@ -185,9 +454,61 @@ async def process_with_perplexity(ocr_result, args, model="sonar-pro"):
     
     return None
 
+async def first_successful(tasks, accept=lambda result: result is not None):
+    """
+    Wait for the first task that finishes with a result and cancel the rest.
+    
+    Args:
+        tasks: The tasks to race
+        accept (optional): Predicate deciding whether a result counts as a success.
+            Defaults to any non-None result.
+        
+    Returns:
+        The first accepted result. If every task fails, the last one's outcome is
+        returned (or its exception raised).
+    """
+    pending = set(tasks)
+    try:
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                last_task = task
+                if task.exception() is None and accept(task.result()):
+                    return task.result()
+        return last_task.result()
+    finally:
+        # Losers are cancelled before they can print anything
+        for task in pending:
+            task.cancel()
+
+def is_confident_answer(ocr_result):
+    """
+    Check whether Gemini's answer is specific enough to skip the Sonar models.
+    
+    The answer has to name one of the options, by its text or by its number or
+    letter, and come with a rationale. Answers like "I don't know" never match.
+    
+    Args:
+        ocr_result: Gemini's OCR result, including its answer
+        
+    Returns:
+        bool: True if the answer can be trusted on its own
+    """
+    answer = ocr_result.answer.strip().lower()
+    # A rationale of a word or two means Gemini didn't really reason about it
+    if not answer or len(ocr_result.rationale.strip()) <= 10:
+        return False
+    
+    options = [option.strip().lower() for option in ocr_result.options]
+    # The prompt allows answering with just the option's label, e.g. "B" or "2."
+    labels = {str(i + 1) for i in range(len(options))} | {chr(ord("a") + i) for i in range(len(options))}
+    if answer.rstrip(".)") in labels:
+        return True
+    return any(answer == option or answer in option for option in options)
+
 async def process_with_gemini_ocr(image, args):
-    """Process the image with Gemini OCR"""
-    global ocr_result
+    """Process the image with Gemini OCR and return the result, or None if it failed"""
+    global ocr_cache_dirty
     try:
         # Only show debug messages if not using the --only-sonar* flags or if debug is enabled
         if args.debug and not (args.only_sonar or args.only_sonar_pro or args.only_sonar_reasoning):
@@ -196,39 +517,75 @@ async def process_with_gemini_ocr(image, args):
         elif args.debug:
             logger.info("Sending image to Gemini for OCR (output suppressed)...")
         
-        # Send image to Gemini for OCR
-        ocr_result = await extract_text_with_gemini(image, args.debug)
+        gemini = load_gemini()
+        
+        # Reuse the result for a screen we've already OCR'd. With --no-ocr-cache
+        # the lookup is skipped but the fresh result still replaces the cached one
+        cache_key = await asyncio.to_thread(hash_image, image)
+        cached = None if args.no_ocr_cache else ocr_cache.get(cache_key)
+        # An entry from an OCR-only run has no answer to show
+        if cached is not None and not cached["answer"] and not args.ocr_only_gemini:
+            cached = None
+        if cached is not None:
+            ocr_cache.move_to_end(cache_key)
+            ocr_result = gemini.OCRResult(**cached)
+            if args.debug:
+                logger.info("Using cached Gemini OCR result")
+        else:
+            # Send image to Gemini for OCR
+            ocr_result = await run_with_timeout(
+                gemini.extract_text_with_gemini(image, args.debug, ocr_only=args.ocr_only_gemini),
+                TIMEOUTS.gemini_ocr
+            )
+            
+            # Cache the result, evicting the least recently used entry when full
+            ocr_cache[cache_key] = ocr_result.model_dump()
+            ocr_cache.move_to_end(cache_key)
+            while len(ocr_cache) > OCR_CACHE_SIZE:
+                ocr_cache.popitem(last=False)
+            ocr_cache_dirty = True
         
         # Print the OCR result only if not using the --only-sonar* flags
-        if not (args.only_sonar or args.only_sonar_pro or args.only_sonar_reasoning):
+        if args.ocr_only_gemini:
+            # There is no Gemini answer, so only the extracted text can be shown
+            only_sonar = args.only_sonar or args.only_sonar_pro or args.only_sonar_reasoning
+            if (args.debug or args.show_ocr) and not only_sonar:
+                emit(
+                    f"\n{ocr_result.question}\n",
+                    *[f"  {i+1}. {option}" for i, option in enumerate(ocr_result.options)]
+                )
+        elif not (args.only_sonar or args.only_sonar_pro or args.only_sonar_reasoning):
             if args.debug:
                 # In debug mode, show full details
-                print("\n--- Gemini OCR Result ---")
-                print(f"Question: {ocr_result.question}")
-                print("Options:")
-                for i, option in enumerate(ocr_result.options):
-                    print(f"  {i+1}. {option}")
-                print(f"Gemini Answer: {ocr_result.answer}")
-                print(f"Gemini Rationale: {ocr_result.rationale}")
+                emit(
+                    "\n--- Gemini OCR Result ---",
+                    f"Question: {ocr_result.question}",
+                    "Options:",
+                    *[f"  {i+1}. {option}" for i, option in enumerate(ocr_result.options)],
+                    f"Gemini Answer: {ocr_result.answer}",
+                    f"Gemini Rationale: {ocr_result.rationale}"
+                )
             elif args.show_ocr:
                 # If --show-ocr flag is enabled, show question and options with spacing
                 # Add a newline before the first line of output
-                print(f"\n{ocr_result.question}\n")
-                for i, option in enumerate(ocr_result.options):
-                    print(f"  {i+1}. {option}")
-                print("")
-                # Print the answer in purplish color
-                print(f"\033[38;5;135m{ocr_result.answer}\033[0m")
+                emit(
+                    f"\n{ocr_result.question}\n",
+                    *[f"  {i+1}. {option}" for i, option in enumerate(ocr_result.options)],
+                    "",
+                    # Print the answer in purplish color
+                    f"\033[38;5;135m{ocr_result.answer}\033[0m"
+                )
             else:
                 # By default, only print the answer in purplish color with a newline before
-                print(f"\n\033[38;5;135m{ocr_result.answer}\033[0m")
+                emit(f"\n\033[38;5;135m{ocr_result.answer}\033[0m")
+            record_answer(ocr_result.answer)
         
         return ocr_result
     except TimeoutError as e:
         # Always log errors, but only print them if not using --only-sonar* flags or if in debug mode
         logger.error(f"Gemini OCR API request timed out: {e}")
         if args.debug:
-            print(f"Error: Gemini OCR API request timed out after {API_TIMEOUT} seconds")
+            print(f"Error: Gemini OCR API request timed out after {TIMEOUTS.gemini_ocr} seconds")
         elif not (args.only_sonar or args.only_sonar_pro or args.only_sonar_reasoning):
             print("Error: Gemini OCR API request timed out")
     except Exception as e:
@@ -241,7 +598,7 @@ async def process_with_gemini_ocr(image, args):
 
 async def async_main(args):
     """Async version of main function to handle async API calls"""
-    global ocr_result
+    global answer_tally
     try:
         # Handle the --only-sonar* flags
         if args.only_sonar or args.only_sonar_pro or args.only_sonar_reasoning:
@@ -269,6 +626,9 @@ async def async_main(args):
             if args.debug:
                 logger.info("Using Gemini OCR with only the specified Sonar model.")
                 
+            # Gemini's answer is never shown, so don't ask for one
+            args.ocr_only_gemini = True
+            
             # Warn if --show-ocr is used with --only-sonar* flags
             if args.show_ocr:
                 if args.debug:
@@ -276,20 +636,21 @@ async def async_main(args):
                 # Disable show_ocr to ensure Gemini output is suppressed
                 args.show_ocr = False
         
-        # Check if an image path was provided
+        # With --agree, count answers as they're printed so the run can stop early
+        if args.agree:
+            answer_tally = AnswerTally(args.agree)
+        
+        # Get the image on a worker thread; run_in_executor submits the job right away,
+        # so it runs while the provider SDKs are imported below
+        loop = asyncio.get_running_loop()
         if hasattr(args, 'image_path') and args.image_path:
             # Load the image from the provided path
-            try:
-                image = Image.open(args.image_path)
-                output_path = args.image_path
-                if args.debug:
-                    logger.info(f"Using provided image: {args.image_path}")
-            except Exception as e:
-                logger.error(f"Error loading image from path {args.image_path}: {e}")
-                raise ValueError(f"Failed to load image from path: {e}")
+            image_future = loop.run_in_executor(None, load_image, args.image_path)
         else:
             # Take screenshot
-            output_path, image = take_right_third_screenshot(
+            image_future = loop.run_in_executor(
+                None,
+                load_screenshot().take_right_third_screenshot,
                 args.output, 
                 args.quality, 
                 args.resize, 
@@ -297,56 +658,134 @@ async def async_main(args):
                 args.save_original
             )
         
+        load_enabled_providers(args)
+        
+        if hasattr(args, 'image_path') and args.image_path:
+            try:
+                image = await image_future
+                output_path = args.image_path
+                if args.debug:
+                    logger.info(f"Using provided image: {args.image_path}")
+            except Exception as e:
+                logger.error(f"Error loading image from path {args.image_path}: {e}")
+                raise ValueError(f"Failed to load image from path: {e}")
+        else:
+            output_path, image = await image_future
+        
         # Create tasks for all models that can run in parallel immediately
         tasks = []
         
         # Start GPT and Mistral immediately - they don't need to wait for OCR
         if not args.no_gpt:
-            tasks.append(process_with_gpt(image, args))
+            tasks.append(asyncio.create_task(process_with_gpt(image, args)))
         elif args.debug:
             logger.info("Skipping GPT-4o analysis as requested.")
             
         if not args.no_mistral:
-            tasks.append(process_with_mistral(image, args))
+            tasks.append(asyncio.create_task(process_with_mistral(image, args)))
         elif args.debug:
             logger.info("Skipping Mistral analysis as requested.")
         
         # Create a separate task for Gemini OCR and Perplexity models
         # This allows Perplexity to start as soon as OCR is done without waiting for GPT/Mistral
         async def process_ocr_and_perplexity():
-            global ocr_result
+            # With --speculative-sonar, send the screenshot straight to Sonar Pro so it
+            # doesn't have to wait for OCR; the OCR-based Sonar Pro request races it
+            speculative_task = None
+            if args.speculative_sonar and not args.no_sonar_pro:
+                if args.debug:
+                    print("Sending image to Perplexity for analysis using model: sonar-pro...")
+                speculative_task = asyncio.create_task(run_with_timeout(
+                    load_perplexity().analyze_trivia_image_with_perplexity(image, args.debug, "sonar-pro", validate=args.debug),
+                    TIMEOUTS.sonar_pro
+                ))
             
             # Skip if Gemini OCR is disabled
             if args.no_gemini_ocr:
                 if args.debug:
                     logger.info("Skipping Gemini OCR analysis as requested.")
+                if speculative_task:
+                    await process_with_perplexity(None, args, "sonar-pro", analysis=speculative_task)
                 return
                 
-            # Run Gemini OCR
-            ocr_result = await process_with_gemini_ocr(image, args)
+            # Warm up a Perplexity connection for each Sonar request while OCR runs
+            text_requests = (not args.no_sonar) + (not args.no_sonar_pro) + (not args.no_sonar_reasoning)
+            prewarm_task = None
+            if text_requests:
+                prewarm_task = asyncio.create_task(load_perplexity().prewarm(text_requests))
             
-            # If OCR failed, we can't run Perplexity models
-            if not ocr_result:
-                return
+            try:
+                # Run Gemini OCR
+                try:
+                    ocr_result = await process_with_gemini_ocr(image, args)
+                except asyncio.CancelledError:
+                    if speculative_task:
+                        speculative_task.cancel()
+                    raise
                 
-            # Create tasks for enabled Perplexity models
-            perplexity_tasks = []
-            
-            if not args.no_sonar:
-                perplexity_tasks.append(process_with_perplexity(ocr_result, args, "sonar"))
-            
-            if not args.no_sonar_pro:
-                perplexity_tasks.append(process_with_perplexity(ocr_result, args, "sonar-pro"))
-            
-            if not args.no_sonar_reasoning:
-                perplexity_tasks.append(process_with_perplexity(ocr_result, args, "sonar-reasoning"))
-            
-            # Run enabled Perplexity models in parallel if any
-            if perplexity_tasks:
-                await asyncio.gather(*perplexity_tasks)
+                # If OCR failed, we can't run Perplexity models on the text
+                if not ocr_result:
+                    if speculative_task:
+                        await process_with_perplexity(None, args, "sonar-pro", analysis=speculative_task)
+                    return
+                
+                # Save the Sonar requests when Gemini's own answer names one of the options
+                if args.skip_sonar_if_confident and is_confident_answer(ocr_result):
+                    if args.debug:
+                        logger.info("Gemini's answer matches an option, skipping the Perplexity models")
+                    if speculative_task:
+                        speculative_task.cancel()
+                    return
+                    
+                # Schedule the enabled Perplexity models right away so they all start
+                # on the next loop iteration after OCR resolves
+                perplexity_tasks = []
+                # Tasks feeding another one, cancelled with it but never awaited here
+                raced_tasks = []
+                
+                if not args.no_sonar:
+                    perplexity_tasks.append(asyncio.create_task(process_with_perplexity(ocr_result, args, "sonar")))
+                
+                if speculative_task:
+                    # Use whichever Sonar Pro answer arrives first
+                    text_task = asyncio.create_task(run_with_timeout(
+                        load_perplexity().analyze_trivia_with_perplexity(ocr_result, args.debug, "sonar-pro", validate=args.debug),
+                        TIMEOUTS.sonar_pro
+                    ))
+                    # The Perplexity module reports failures as "Error (...)" answers
+                    race = asyncio.create_task(first_successful(
+                        [speculative_task, text_task],
+                        accept=lambda result: result is not None and not result.answer.startswith("Error (")
+                    ))
+                    # The chain can be cancelled before the race is awaited
+                    raced_tasks.extend([speculative_task, text_task, race])
+                    perplexity_tasks.append(asyncio.create_task(
+                        process_with_perplexity(ocr_result, args, "sonar-pro", analysis=race)
+                    ))
+                elif not args.no_sonar_pro:
+                    perplexity_tasks.append(asyncio.create_task(process_with_perplexity(ocr_result, args, "sonar-pro")))
+                
+                if not args.no_sonar_reasoning:
+                    perplexity_tasks.append(asyncio.create_task(process_with_perplexity(ocr_result, args, "sonar-reasoning")))
+                
+                # Each model prints its own answer, so handle them in completion order
+                # rather than waiting on all of them together
+                try:
+                    for task in asyncio.as_completed(perplexity_tasks):
+                        await task
+                finally:
+                    # Stop any models still running if this chain is cancelled (e.g. by --agree)
+                    for task in perplexity_tasks + raced_tasks:
+                        task.cancel()
+            finally:
+                # Nothing is left to warm up for once the chain is done or stopped early
+                if prewarm_task:
+                    if prewarm_task.done() and not prewarm_task.cancelled() and prewarm_task.exception():
+                        logger.debug(f"Perplexity connection warm-up failed: {prewarm_task.exception()}")
+                    prewarm_task.cancel()
         
         # Add the OCR and Perplexity task to the main tasks list
-        tasks.append(process_ocr_and_perplexity())
+        tasks.append(asyncio.create_task(process_ocr_and_perplexity()))
         
         # If all models are disabled, just return
         if not tasks:
@@ -354,8 +793,24 @@ async def async_main(args):
                 logger.info("All analysis options are disabled. No analysis performed.")
             return
             
-        # Run all tasks concurrently
-        await asyncio.gather(*tasks)
+        # Run all tasks concurrently; one chain failing must not cancel the others
+        run = asyncio.gather(*tasks, return_exceptions=True)
+        
+        # With --agree, stop the remaining providers once enough answers match
+        if answer_tally is not None:
+            agreed = asyncio.create_task(answer_tally.agreed.wait())
+            done, _ = await asyncio.wait({run, agreed}, return_when=asyncio.FIRST_COMPLETED)
+            if agreed in done:
+                if args.debug:
+                    logger.info(f"{args.agree} provider(s) agree, cancelling the rest")
+                for task in tasks:
+                    task.cancel()
+            else:
+                agreed.cancel()
+        
+        for result in await run:
+            if isinstance(result, Exception):
+                logger.error(f"Error in analysis task: {result}")
         
     except Exception as e:
         logger.error(f"Error in main execution: {e}")
@@ -363,11 +818,53 @@ async def async_main(args):
             print(f"Error: {e}")
         else:
             print("An error occurred. Run with --debug for more information.")
+    finally:
+        answer_tally = None
 
-def main():
-    # Declare global variable at the beginning of the function
-    global API_TIMEOUT
+def prefetch_dns(args):
+    """
+    Resolve the API hosts of the enabled providers on a background thread.
+    
+    This runs while the screenshot is taken and the SDKs are imported, so the
+    system resolver cache is warm by the time the first requests connect.
+    
+    Args:
+        args: Parsed command line arguments
+    """
+    only_sonar = args.only_sonar or args.only_sonar_pro or args.only_sonar_reasoning
+    hosts = []
+    if not args.no_gpt and not only_sonar:
+        hosts.append(OPENAI_HOST)
+    if not args.no_mistral and not only_sonar:
+        hosts.append(MISTRAL_HOST)
+    if not args.no_gemini_ocr or only_sonar:
+        hosts.append(GEMINI_HOST)
+    # Sonar needs OCR text, unless Sonar Pro is also sent the raw screenshot
+    sonar_enabled = only_sonar or not (args.no_sonar and args.no_sonar_pro and args.no_sonar_reasoning)
+    if sonar_enabled and (only_sonar or not args.no_gemini_ocr or args.speculative_sonar):
+        hosts.append(PERPLEXITY_HOST)
     
+    def resolve():
+        for host in hosts:
+            try:
+                socket.getaddrinfo(host, 443, type=socket.SOCK_STREAM)
+            except OSError:
+                # The real request will report the failure
+                pass
+    
+    threading.Thread(target=resolve, daemon=True).start()
+
+@functools.lru_cache(maxsize=None)
+def build_parser():
+    """
+    Build the command line argument parser.
+    
+    The parser is built once and reused, since the background server parses
+    every forwarded request with it.
+    
+    Returns:
+        argparse.ArgumentParser: The parser
+    """
     parser = argparse.ArgumentParser(description="Take a screenshot of the right third of the screen and analyze trivia questions")
     parser.add_argument("-o", "--output", help="Output file path (default: screenshots folder with timestamp)")
     parser.add_argument("-q", "--quality", type=int, default=60, 
@@ -398,29 +895,74 @@ def main():
     sonar_only_group.add_argument("--only-sonar-reasoning", action="store_true",
                         help="Only use Perplexity AI Sonar Reasoning model with Gemini OCR (suppresses Gemini output)")
     
+    parser.add_argument("--speculative-sonar", action="store_true",
+                        help="Also send the screenshot directly to Sonar Pro and use whichever Sonar Pro answer arrives first")
+    parser.add_argument("--agree", type=int, default=0, metavar="N",
+                        help="Stop the remaining providers once N of them give the same answer (default: wait for all)")
+    parser.add_argument("--first-answer-wins", dest="agree", action="store_const", const=1,
+                        help="Stop the remaining providers as soon as one answers (same as --agree 1)")
+    parser.add_argument("--skip-sonar-if-confident", action="store_true",
+                        help="Don't send the OCR result to the Sonar models when Gemini's answer matches one of the options")
     parser.add_argument("--debug", action="store_true",
                         help="Print debug information")
     parser.add_argument("--show-ocr", action="store_true",
                         help="Show the OCR extracted question and options")
-    parser.add_argument("--timeout", type=int, default=API_TIMEOUT,
-                        help="Timeout for API calls in seconds (default: {})".format(API_TIMEOUT))
+    parser.add_argument("--ocr-only-gemini", action="store_true",
+                        help="Only use Gemini to extract the question for the Sonar models, without its own answer "
+                             "(implied by the --only-sonar* flags)")
+    parser.add_argument("--no-ocr-cache", action="store_true",
+                        help="Always send the image to Gemini OCR instead of reusing a cached result for the same screen")
+    parser.add_argument("--timeout", type=float, default=None,
+                        help="Timeout for all API calls in seconds (default: per-provider, {})".format(
+                            ", ".join(f"{field.name}={getattr(TIMEOUTS, field.name):g}" for field in fields(TIMEOUTS))))
+    # One --timeout-<provider> flag per TimeoutConfig field, e.g. --timeout-sonar-pro
+    for field in fields(TimeoutConfig):
+        parser.add_argument(f"--timeout-{field.name.replace('_', '-')}", type=float, default=None, metavar="SECONDS",
+                            help=f"Timeout for {field.name} in seconds, overriding --timeout")
+    parser.add_argument("--serve", action="store_true",
+                        help="Run as a background server that keeps API clients warm; later runs are forwarded to it")
+    parser.add_argument("--spawn-server", action="store_true",
+                        help="If no background server is running, start one for later runs")
+    parser.add_argument("--no-daemon", action="store_true",
+                        help="Run in this process even if a background server is running")
     parser.add_argument("image_path", nargs="?", help="Path to an image file to analyze instead of taking a screenshot")
-    args = parser.parse_args()
+    return parser
+
+def configure(args):
+    """
+    Validate the parsed arguments and apply the timeouts and logging level they set.
+    
+    Args:
+        args: Parsed command line arguments
+        
+    Returns:
+        bool: False if the arguments are invalid
+    """
+    global TIMEOUTS
     
     # Validate that only one of the --only-sonar* flags is used at a time
     only_sonar_flags = [args.only_sonar, args.only_sonar_pro, args.only_sonar_reasoning]
     if sum(only_sonar_flags) > 1:
         print("Error: The --only-sonar, --only-sonar-pro, and --only-sonar-reasoning flags are mutually exclusive.")
         print("Please use only one of these flags at a time.")
-        return
+        return False
+    
+    if args.agree < 0:
+        print("Error: --agree must be a positive number of providers.")
+        return False
     
-    # Update timeout if specified
-    API_TIMEOUT = args.timeout
-    # Update timeout in modules
-    set_gpt_api_timeout(API_TIMEOUT)
-    set_mistral_api_timeout(API_TIMEOUT)
-    set_gemini_api_timeout(API_TIMEOUT)
-    set_perplexity_api_timeout(API_TIMEOUT)
+    # Start from the environment each time so a --timeout from an earlier
+    # daemon request doesn't stick
+    TIMEOUTS = TimeoutConfig.from_env()
+    # A --timeout on the command line overrides every provider's timeout, and a
+    # --timeout-<provider> flag overrides both for that provider. The modules
+    # pick these up when they are loaded for a run.
+    for field in fields(TIMEOUTS):
+        value = getattr(args, f"timeout_{field.name}")
+        if value is None:
+            value = args.timeout
+        if value is not None:
+            setattr(TIMEOUTS, field.name, value)
     
     # Configure logging level based on debug flag
     if args.debug:
@@ -429,21 +971,107 @@ def main():
         # Set to ERROR level to suppress INFO logs when not in debug mode
         logger.setLevel(logging.ERROR)
     
+    return True
+
+async def run_once(args):
+    """Run a single analysis and release the resources tied to the event loop"""
+    use_shared_executor()
+    try:
+        await async_main(args)
+    finally:
+        # The HTTP session belongs to this event loop, so close it before the loop exits
+        await close_sessions()
+
+async def handle_daemon_request(request):
+    """
+    Run an analysis for a client of the background server.
+    
+    Args:
+        request (dict): The client's command line arguments ("argv") and working
+            directory ("cwd"), used to resolve relative paths
+    """
+    args = build_parser().parse_args(request["argv"])
+    
+    # Paths on the command line are relative to the client, not the server
+    cwd = request["cwd"]
+    if args.image_path:
+        args.image_path = os.path.join(cwd, args.image_path)
+    if args.output:
+        args.output = os.path.join(cwd, args.output)
+    if isinstance(args.save_original, str):
+        args.save_original = os.path.join(cwd, args.save_original)
+    
+    if not configure(args):
+        return
+    
+    await async_main(args)
+    
+    # Persist new OCR results now rather than only when the server exits
+    save_ocr_cache()
+
+async def serve_forever():
+    """Run the background server, closing the shared HTTP session on exit"""
+    use_shared_executor()
+    # Pay the import and client setup cost once, before the first request
+    load_all_providers()
+    try:
+        await daemon.serve(handle_daemon_request)
+    finally:
+        await close_sessions()
+
+def main():
+    parser = build_parser()
+    args = parser.parse_args()
+    
+    # Hand the run to a background server if one is running
+    if not args.serve and not args.no_daemon:
+        try:
+            if daemon.send_request({"argv": sys.argv[1:], "cwd": os.getcwd()}):
+                return
+        except KeyboardInterrupt:
+            # The server has been told to cancel the run
+            print("\nOperation cancelled by user")
+            return
+        
+        # Start a server for the next run; this one still runs in-process
+        if args.spawn_server and daemon.is_supported():
+            daemon.spawn_server([sys.executable, os.path.abspath(__file__), "--serve"])
+            if args.debug:
+                logger.info(f"Starting a background server on {daemon.SOCKET_PATH}")
+    
+    if args.serve and not daemon.is_supported():
+        print("Error: --serve requires Unix domain sockets, which this platform does not support.")
+        return
+    
+    if not configure(args):
+        return
+    
+    # Warm up DNS for this run (the server keeps its connections open instead)
+    if not args.serve:
+        prefetch_dns(args)
+    
+    # Use uvloop's faster event loop where it is installed
+    if uvloop is not None:
+        asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    
     try:
-        # Run the async main function
-        asyncio.run(async_main(args))
+        if args.serve:
+            # Serve forwarded runs until interrupted
+            asyncio.run(serve_forever())
+        else:
+            # Run the async main function
+            asyncio.run(run_once(args))
     except KeyboardInterrupt:
         print("\nOperation cancelled by user")
     except Exception as e:
         logger.error(f"Unhandled exception: {e}")
         print(f"Error: {e}")
     finally:
-        # Clean up thread pools
-        chatgpt_shutdown()
-        mistral_shutdown()
-        gemini_shutdown()
-        perplexity_shutdown()
-        screenshot_shutdown()
+        # Persist any new OCR results
+        save_ocr_cache()
+        
+        # Clean up the thread pool
+        executors.shutdown()
 
 if __name__ == "__main__":
     main()
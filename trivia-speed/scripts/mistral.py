@@ -8,19 +8,22 @@ to analyze trivia questions from images.
 
 import asyncio
 import base64
-import concurrent.futures
 import functools
-import json
 import logging
 import os
 import time
+from types import SimpleNamespace
 from typing import Optional
 
+import httpx
+import orjson
 from mistralai import Mistral
 from PIL import Image
 from pydantic import BaseModel
 # Import screenshot module for image preparation
-from screenshot import prepare_image_for_api
+from screenshot import IMAGE_MIME_TYPES, prepare_image_for_api
+# Thread pool shared by all modules
+from executors import thread_pool
 
 # Configure logging
 logger = logging.getLogger('trivia-speed')
@@ -36,6 +39,16 @@ MISTRAL_API_KEY = os.getenv("MISTRAL_API_KEY")
 MODEL = "pixtral-12b-2409"
 MAX_TOKENS = int(os.getenv("MISTRAL_MAX_TOKENS", "200"))  # Reduced token count for faster response
 API_TIMEOUT = int(os.getenv("MISTRAL_API_TIMEOUT", "15"))  # Timeout for API calls in seconds
+# Pixtral downscales images to fit 1024x1024, so larger uploads only add bytes.
+# These match GPT-4o's settings, so with both on JPEG they share one encode
+IMAGE_MAX_DIMENSION = 1024
+IMAGE_QUALITY = 70
+# Seconds an idle connection stays in the pool. httpx's default of 5 s drops the
+# TLS connection between questions when main.py runs as a background server
+KEEPALIVE_EXPIRY = 60
+# Upload format: JPEG encodes fastest, WEBP is smaller on the wire but slower to encode
+IMAGE_FORMAT = os.getenv("MISTRAL_IMAGE_FORMAT", "JPEG").upper()
+IMAGE_MIME_TYPE = IMAGE_MIME_TYPES[IMAGE_FORMAT]
 
 # Do not change the system prompt - this is for the AI
 SYSTEM_PROMPT = """
@@ -62,11 +75,30 @@ class TriviaAnalysis(BaseModel):
     rationale: str
     answer: str
 
-# Create a single Mistral client instance to reuse
-client = Mistral(api_key=MISTRAL_API_KEY)
+# Structured output schema: strict mode makes the model emit exactly these
+# fields, so the response always parses
+RESPONSE_FORMAT = {
+    "type": "json_schema",
+    "json_schema": {
+        "name": "TriviaAnalysis",
+        "schema": {
+            **TriviaAnalysis.model_json_schema(),
+            "additionalProperties": False  # Required by strict mode
+        },
+        "strict": True
+    }
+}
 
-# Thread pool for CPU-bound tasks
-thread_pool = concurrent.futures.ThreadPoolExecutor(max_workers=4)
+# Create a single Mistral client instance to reuse, on an httpx client that
+# otherwise matches the SDK's default one
+client = Mistral(
+    api_key=MISTRAL_API_KEY,
+    async_client=httpx.AsyncClient(limits=httpx.Limits(
+        max_connections=100,
+        max_keepalive_connections=20,
+        keepalive_expiry=KEEPALIVE_EXPIRY
+    ))
+)
 
 def prepare_api_request(image):
     """
@@ -79,7 +111,7 @@ def prepare_api_request(image):
         dict: The API request payload
     """
     # Encode the image to base64
-    base64_image = prepare_image_for_api(image)
+    base64_image = prepare_image_for_api(image, IMAGE_QUALITY, IMAGE_MAX_DIMENSION, IMAGE_FORMAT)
     
     messages = [
         {
@@ -95,7 +127,7 @@ def prepare_api_request(image):
                 },
                 {
                     "type": "image_url",
-                    "image_url": f"data:image/jpeg;base64,{base64_image}"
+                    "image_url": f"data:{IMAGE_MIME_TYPE};base64,{base64_image}"
                 }
             ]
         }
@@ -106,20 +138,21 @@ def prepare_api_request(image):
         "messages": messages,
         "max_tokens": MAX_TOKENS,
         "temperature": 0.1,  # Lower temperature for more deterministic responses
-        "response_format": {
-            "type": "json_object"
-        }
+        "response_format": RESPONSE_FORMAT
     }
     
     return request
 
-async def analyze_trivia_with_mistral(image, debug=False):
+async def analyze_trivia_with_mistral(image, debug=False, validate=True):
     """
     Send the image to Mistral for analysis.
     
     Args:
         image (PIL.Image): The image to analyze
         debug (bool, optional): Whether to print debug information.
+        validate (bool, optional): Whether to build a validated Pydantic model.
+            When False, a SimpleNamespace with the same fields is returned
+            instead. Defaults to True.
         
     Returns:
         TriviaAnalysis: The parsed response from Mistral with rationale and answer
@@ -132,7 +165,7 @@ async def analyze_trivia_with_mistral(image, debug=False):
     start_time = time.time()
     
     # Prepare the API request in a separate thread to avoid blocking
-    loop = asyncio.get_event_loop()
+    loop = asyncio.get_running_loop()
     try:
         request = await loop.run_in_executor(
             thread_pool, 
@@ -154,45 +187,17 @@ async def analyze_trivia_with_mistral(image, debug=False):
             
             # Parse the JSON response
             try:
-                result = json.loads(content)
+                result = orjson.loads(content)
                 # Extract rationale and answer from the JSON
                 rationale = result.get("rationale", "")
                 answer = result.get("answer", "")
                 
+                if not validate:
+                    return SimpleNamespace(rationale=rationale, answer=answer)
                 return TriviaAnalysis(rationale=rationale, answer=answer)
-            except json.JSONDecodeError as e:
-                logger.error(f"Failed to parse JSON response: {e}")
-                # Fallback to the old parsing method if JSON parsing fails
-                lines = content.strip().split('\n')
-                rationale = ""
-                answer = ""
-                
-                # More robust parsing for non-JSON responses
-                if "rationale" in content.lower() or "answer" in content.lower():
-                    # Try to extract structured data from unstructured text
-                    for line in lines:
-                        line = line.strip()
-                        if line.lower().startswith("answer:") or "answer:" in line.lower():
-                            parts = line.lower().split("answer:")
-                            if len(parts) > 1:
-                                answer = parts[1].strip()
-                        elif line.lower().startswith("rationale:") or "rationale:" in line.lower():
-                            parts = line.lower().split("rationale:")
-                            if len(parts) > 1:
-                                rationale = parts[1].strip()
-                        elif not answer and line:  # If we haven't found the answer yet, it's part of the rationale
-                            rationale += line + " "
-                else:
-                    # Simple approach: last line is likely the answer
-                    if lines:
-                        answer = lines[-1].strip()
-                        rationale = " ".join(lines[:-1]).strip()
-                
-                # If we still don't have an answer, use the whole content as the answer
-                if not answer:
-                    answer = content.strip()
-                    
-                return TriviaAnalysis(rationale=rationale.strip(), answer=answer)
+            except orjson.JSONDecodeError as e:
+                # Only possible if the output was cut off at MAX_TOKENS
+                raise ValueError(f"Mistral returned invalid JSON: {e}")
                 
         except asyncio.TimeoutError:
             logger.error(f"API request timed out after {API_TIMEOUT} seconds")
@@ -204,10 +209,6 @@ async def analyze_trivia_with_mistral(image, debug=False):
         logger.error(f"Error preparing API request: {e}")
         raise ValueError(f"Failed to prepare API request: {e}")
 
-def shutdown():
-    """Shutdown the thread pool"""
-    thread_pool.shutdown(wait=False)
-
 def set_api_timeout(timeout):
     """Set the API timeout value"""
     global API_TIMEOUT
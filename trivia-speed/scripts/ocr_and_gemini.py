@@ -9,17 +9,17 @@ to perform OCR on trivia question images and provide answers.
 import os
 import time
 import asyncio
-import json
-import functools
-import concurrent.futures
 import logging
 from PIL import Image
 from typing import Optional
 import google.generativeai as genai
+import orjson
 from pydantic import BaseModel
 
 # Import screenshot module for image preparation
 from screenshot import prepare_image_for_api
+# Thread pool shared by all modules
+from executors import thread_pool
 
 # Configure logging
 logger = logging.getLogger('trivia-speed')
@@ -34,6 +34,11 @@ GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
 MODEL = "gemini-2.0-flash"
 MAX_TOKENS = int(os.getenv("GEMINI_MAX_TOKENS", "10000"))  # Token count for response
 API_TIMEOUT = int(os.getenv("GEMINI_API_TIMEOUT", "15"))  # Timeout for API calls in seconds
+# Downscale so neither side exceeds this many pixels before upload; 0 sends the
+# full resolution. OCR needs sharper text than GPT-4o and Mistral, so this is
+# higher than their 1024
+IMAGE_MAX_DIMENSION = int(os.getenv("GEMINI_IMAGE_MAX_DIM", "1280")) or None
+IMAGE_QUALITY = 75
 
 # Configure the Gemini API
 if GEMINI_API_KEY:
@@ -63,6 +68,27 @@ Example:
 }
 """
 
+# Prompt for OCR-only requests, when the text is only needed for the Perplexity
+# models. Skipping the answer cuts the output tokens Gemini has to generate
+OCR_ONLY_PROMPT = """
+# Role
+You are an OCR engine.
+
+# Task
+I will give you an image containing a trivia question. Transcribe the question and its multiple choice options exactly. Do not answer the question.
+
+# Output Format
+Provide your response in valid JSON format with these fields:
+- "question": The full text of the question
+- "options": An array of the multiple choice options (if present)
+
+Example:
+{
+  "question": "Which company was founded by Bill Gates and Paul Allen in 1975?",
+  "options": ["Apple", "Microsoft", "IBM"]
+}
+"""
+
 # Define the Pydantic model for structured output
 class OCRResult(BaseModel):
     question: str
@@ -70,28 +96,26 @@ class OCRResult(BaseModel):
     rationale: str
     answer: str
 
-# Thread pool for CPU-bound tasks
-thread_pool = concurrent.futures.ThreadPoolExecutor(max_workers=4)
+# Create a single model instance to reuse, along with its underlying connection
+gemini_model = genai.GenerativeModel(MODEL)
 
-def prepare_api_request(image):
+def prepare_api_request(base64_image, ocr_only=False):
     """
     Prepare the API request payload for Gemini.
     
     Args:
-        image (PIL.Image): The image to analyze
+        base64_image (str): The base64 encoded JPEG image to analyze
+        ocr_only (bool, optional): Only ask for the question and options. Defaults to False.
         
     Returns:
         dict: The API request payload
     """
-    # Convert PIL image to base64
-    base64_image = prepare_image_for_api(image)
-    
     # Create the content parts
     contents = [
         {
             "role": "user",
             "parts": [
-                {"text": SYSTEM_PROMPT},
+                {"text": OCR_ONLY_PROMPT if ocr_only else SYSTEM_PROMPT},
                 {"inline_data": {"mime_type": "image/jpeg", "data": base64_image}}
             ]
         }
@@ -109,13 +133,15 @@ def prepare_api_request(image):
         "generation_config": generation_config
     }
 
-async def extract_text_with_gemini(image, debug=False):
+async def extract_text_with_gemini(image, debug=False, ocr_only=False):
     """
     Send the image to Gemini for OCR analysis and answer using structured output.
     
     Args:
         image (PIL.Image): The image to analyze
         debug (bool, optional): Whether to print debug information.
+        ocr_only (bool, optional): Only extract the question and options; the
+            result's rationale and answer are left empty. Defaults to False.
         
     Returns:
         OCRResult: The parsed response from Gemini with extracted text and answer
@@ -127,28 +153,23 @@ async def extract_text_with_gemini(image, debug=False):
         logger.info("Sending image to Gemini for OCR and analysis...")
     start_time = time.time()
     
-    # Prepare the API request in a separate thread to avoid blocking
-    loop = asyncio.get_event_loop()
+    loop = asyncio.get_running_loop()
     try:
-        # Run the image preparation in a thread pool to avoid blocking the event loop
-        request = await loop.run_in_executor(
-            thread_pool, 
-            functools.partial(prepare_api_request, image)
+        # Only the JPEG encode is worth moving off the event loop; the dict build is trivial
+        base64_image = await loop.run_in_executor(
+            thread_pool, prepare_image_for_api, image, IMAGE_QUALITY, IMAGE_MAX_DIMENSION
         )
+        request = prepare_api_request(base64_image, ocr_only)
         
-        # Create a coroutine to call the Gemini API
-        async def call_gemini_api():
-            model = genai.GenerativeModel(MODEL)
-            response = await loop.run_in_executor(
-                thread_pool,
-                lambda: model.generate_content(**request)
-            )
-            return response
-        
-        # Call with timeout
+        # Call the Gemini API with timeout. The async client runs on the event loop,
+        # so no thread sits blocked on the request, and a cancelled run also
+        # cancels the RPC instead of leaving it running in the pool
         try:
             response = await asyncio.wait_for(
-                call_gemini_api(),
+                gemini_model.generate_content_async(
+                    **request,
+                    request_options={"timeout": API_TIMEOUT}
+                ),
                 timeout=API_TIMEOUT
             )
             
@@ -159,7 +180,7 @@ async def extract_text_with_gemini(image, debug=False):
             # Parse the JSON response
             try:
                 content = response.text
-                result = json.loads(content)
+                result = orjson.loads(content)
                 
                 # Extract fields from the JSON
                 question = result.get("question", "")
@@ -167,8 +188,12 @@ async def extract_text_with_gemini(image, debug=False):
                 rationale = result.get("rationale", "")
                 answer = result.get("answer", "")
                 
+                # An OCR-only request isn't supposed to answer
+                if ocr_only:
+                    rationale = answer = ""
+                
                 return OCRResult(question=question, options=options, rationale=rationale, answer=answer)
-            except json.JSONDecodeError as e:
+            except orjson.JSONDecodeError as e:
                 logger.error(f"Failed to parse JSON response: {e}")
                 # Fallback to using the raw text
                 full_text = response.text
@@ -200,6 +225,8 @@ async def extract_text_with_gemini(image, debug=False):
                     answer = lines[-1]
                 if not rationale:
                     rationale = "Unable to determine rationale from response."
+                if ocr_only:
+                    rationale = answer = ""
                 
                 return OCRResult(question=question, options=options, rationale=rationale, answer=answer)
                 
@@ -213,10 +240,6 @@ async def extract_text_with_gemini(image, debug=False):
         logger.error(f"Error preparing API request: {e}")
         raise ValueError(f"Failed to prepare API request: {e}")
 
-def shutdown():
-    """Shutdown the thread pool"""
-    thread_pool.shutdown(wait=False)
-
 def set_api_timeout(timeout):
     """Set the API timeout value"""
     global API_TIMEOUT
@@ -7,19 +7,27 @@ to analyze trivia questions using OCR results from Gemini.
 """
 
 import asyncio
-import concurrent.futures
+import contextlib
 import functools
-import json
 import logging
 import os
+import random
 import time
+from collections import OrderedDict
+from types import SimpleNamespace
 from typing import Optional
 import re
 
 import aiohttp
+import orjson
 from dotenv import load_dotenv
 from pydantic import BaseModel
 
+# Import screenshot module for image preparation
+from screenshot import prepare_image_for_api
+# Thread pool shared by all modules
+from executors import thread_pool
+
 # Configure logging
 logger = logging.getLogger('trivia-speed')
 
@@ -34,6 +42,25 @@ API_ENDPOINT = "https://api.perplexity.ai/chat/completions"
 MODEL = "sonar-pro"
 MAX_TOKENS = int(os.getenv("PERPLEXITY_MAX_TOKENS", "10000"))  # Token count for response
 API_TIMEOUT = int(os.getenv("PERPLEXITY_API_TIMEOUT", "15"))  # Timeout for API calls in seconds
+# Maximum number of requests in flight at once, to stay under the account's rate
+# limit instead of hitting 429s; 0 means no limit
+MAX_CONCURRENCY = int(os.getenv("PERPLEXITY_MAX_CONCURRENCY", "0"))
+# Number of answers to remember per question, model and options, so a question
+# that comes up again is answered without a request; 0 disables the cache.
+# Entries live as long as the process, so this mostly helps the background server
+RESPONSE_CACHE_SIZE = int(os.getenv("PERPLEXITY_CACHE_SIZE", "0"))
+# Timeout in seconds for the connection warm-up requests sent by prewarm()
+PREWARM_TIMEOUT = 2
+# Number of times a request is retried after a connection failure or a 502/503/504,
+# as long as API_TIMEOUT hasn't run out; 0 disables retries
+MAX_RETRIES = int(os.getenv("PERPLEXITY_MAX_RETRIES", "2"))
+# Timeout in seconds for opening a connection, so a stuck connect is retried
+# instead of using up the whole API_TIMEOUT
+CONNECT_TIMEOUT = 2
+# Delay in seconds before the first retry, doubled for each further one up to 1 s
+RETRY_BACKOFF = 0.25
+# Response statuses that mean the request never reached a model and can be retried
+RETRY_STATUSES = frozenset({502, 503, 504})
 
 # System prompt for Perplexity
 SYSTEM_PROMPT = """
@@ -62,28 +89,120 @@ class TriviaAnalysis(BaseModel):
     rationale: str
     answer: str
 
-# Thread pool for CPU-bound tasks
-thread_pool = concurrent.futures.ThreadPoolExecutor(max_workers=4)
+# Structured output schema, built once rather than on every request
+RESPONSE_FORMAT = {
+    "type": "json_schema",
+    "json_schema": {
+        "schema": TriviaAnalysis.model_json_schema()
+    }
+}
 
-def prepare_api_request(ocr_result, model=MODEL):
+# Patterns used to dig the fields out of sonar-reasoning output that isn't valid JSON
+RATIONALE_PATTERN = re.compile(r'"rationale"\s*:\s*"([^"]*)"')
+ANSWER_PATTERN = re.compile(r'"answer"\s*:\s*"([^"]*)"')
+# How much of an unparseable response to include in the error log
+PARSE_ERROR_EXCERPT = 200
+
+# Cached answers as {"rationale", "answer"} dicts, least recently used first
+response_cache = OrderedDict()
+
+# HTTP session shared by all Perplexity requests so the Sonar models reuse warm
+# keep-alive connections instead of each paying for its own TCP + TLS handshake
+session: Optional[aiohttp.ClientSession] = None
+
+def get_session():
     """
-    Prepare the API request payload for Perplexity.
+    Get the shared HTTP session, creating it on first use.
+    
+    The session must be created from within the running event loop.
+    
+    Returns:
+        aiohttp.ClientSession: The shared session
+    """
+    global session
+    if session is None or session.closed:
+        # Cache DNS for as long as a background server is likely to sit idle
+        # between questions, rather than aiohttp's default of 10 s
+        connector = aiohttp.TCPConnector(limit_per_host=8, keepalive_timeout=60, ttl_dns_cache=300)
+        session = aiohttp.ClientSession(connector=connector)
+    return session
+
+# Semaphore enforcing MAX_CONCURRENCY, created on first use
+request_semaphore: Optional[asyncio.Semaphore] = None
+
+def get_request_limiter():
+    """
+    Get the context manager that limits concurrent requests.
+    
+    Returns:
+        An async context manager: the shared semaphore, or a no-op if MAX_CONCURRENCY is 0
+    """
+    global request_semaphore
+    if MAX_CONCURRENCY <= 0:
+        return contextlib.nullcontext()
+    if request_semaphore is None:
+        request_semaphore = asyncio.Semaphore(MAX_CONCURRENCY)
+    return request_semaphore
+
+async def prewarm(connections=1):
+    """
+    Open keep-alive connections to the API ahead of the first real request.
+    
+    The Sonar requests only go out once OCR has finished, so the DNS lookup and
+    TCP + TLS handshakes can be done while OCR runs. Each connection is opened
+    with an unauthenticated HEAD request and returned to the session's pool.
     
     Args:
-        ocr_result: The OCR result containing question and options
-        model (str, optional): The Perplexity model to use. Defaults to MODEL.
+        connections (int, optional): How many connections to open, one per request
+            that will be sent in parallel. Defaults to 1.
+    """
+    async def open_connection():
+        try:
+            async with get_session().head(API_ENDPOINT, timeout=PREWARM_TIMEOUT) as response:
+                await response.read()
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            # The real request will connect on its own
+            logger.debug(f"Perplexity connection warm-up failed: {e}")
+    
+    await asyncio.gather(*(open_connection() for _ in range(connections)))
+
+async def close_session():
+    """Close the shared HTTP session, if one was opened"""
+    global session
+    if session is not None:
+        await session.close()
+        session = None
+
+@functools.lru_cache(maxsize=8)
+def format_user_prompt(question, options):
+    """
+    Format the OCR'd question and options into the user prompt.
+    
+    The Sonar models are queried in parallel with the same OCR result, so the
+    prompt is cached and built only once per question.
+    
+    Args:
+        question (str): The question text
+        options (tuple): The multiple choice options
         
     Returns:
-        dict: The API request payload
+        str: The user prompt
     """
-    # Format the question and options into a single prompt
-    question_text = ocr_result.question
-    options_text = "\n".join([f"{i+1}. {option}" for i, option in enumerate(ocr_result.options)])
-    
-    user_prompt = f"Question: {question_text}\n\nOptions:\n{options_text}"
+    options_text = "\n".join([f"{i+1}. {option}" for i, option in enumerate(options)])
+    return f"Question: {question}\n\nOptions:\n{options_text}"
+
+def build_request(model, user_content):
+    """
+    Build the API request payload around the user message content.
     
-    # Create the request payload
-    request = {
+    Args:
+        model (str): The Perplexity model to use
+        user_content: The user message content, a prompt string or a list of parts
+        
+    Returns:
+        dict: The API request payload
+    """
+    return {
         "model": model,
         "messages": [
             {
@@ -92,20 +211,55 @@ def prepare_api_request(ocr_result, model=MODEL):
             },
             {
                 "role": "user",
-                "content": user_prompt
+                "content": user_content
             }
         ],
         "max_tokens": MAX_TOKENS,
         "temperature": 0.1,  # Lower temperature for more deterministic responses
-        "response_format": {
-            "type": "json_schema",
-            "json_schema": {
-                "schema": TriviaAnalysis.model_json_schema()
-            }
-        }
+        "response_format": RESPONSE_FORMAT
     }
+
+def prepare_api_request(ocr_result, model=MODEL):
+    """
+    Prepare the API request payload for Perplexity.
+    
+    Args:
+        ocr_result: The OCR result containing question and options
+        model (str, optional): The Perplexity model to use. Defaults to MODEL.
+        
+    Returns:
+        dict: The API request payload
+    """
+    # Format the question and options into a single prompt, shared by every model
+    user_prompt = format_user_prompt(ocr_result.question, tuple(ocr_result.options))
     
-    return request
+    return build_request(model, user_prompt)
+
+def prepare_image_api_request(image, model=MODEL):
+    """
+    Prepare an API request that sends the screenshot instead of OCR text.
+    
+    Args:
+        image (PIL.Image): The image to analyze
+        model (str, optional): The Perplexity model to use. Defaults to MODEL.
+        
+    Returns:
+        dict: The API request payload
+    """
+    base64_image = prepare_image_for_api(image)
+    
+    return build_request(model, [
+        {
+            "type": "text",
+            "text": "The trivia question and its options are in this image."
+        },
+        {
+            "type": "image_url",
+            "image_url": {
+                "url": f"data:image/jpeg;base64,{base64_image}"
+            }
+        }
+    ])
 
 def extract_json_from_sonar_reasoning(content):
     """
@@ -117,25 +271,17 @@ def extract_json_from_sonar_reasoning(content):
     Returns:
         dict: The extracted JSON data
     """
-    # Check if the content contains a <think> section
-    if "<think>" in content and "```json" in content:
-        # Extract the JSON part that comes after the <think> section
-        json_match = re.search(r'```json\s*(.*?)\s*```', content, re.DOTALL)
-        if json_match:
-            json_str = json_match.group(1).strip()
-            try:
-                return json.loads(json_str)
-            except json.JSONDecodeError:
-                logger.error(f"Failed to parse JSON from sonar-reasoning output")
-                # Fall through to try other methods
-    
-    # If no <think> section or no JSON found in code blocks, try to find JSON-like structure
-    json_match = re.search(r'\{.*"rationale".*"answer".*\}', content, re.DOTALL)
-    if json_match:
+    # The JSON object runs from the first brace after the <think> section (which can
+    # contain braces of its own) to the last brace, whether or not the model wraps
+    # it in a ```json block. Two string scans replace a regex pass per format
+    think_end = content.rfind("</think>")
+    start = content.find("{", think_end + len("</think>") if think_end >= 0 else 0)
+    end = content.rfind("}")
+    if start >= 0 and end > start:
         try:
-            return json.loads(json_match.group(0))
-        except json.JSONDecodeError:
-            # Continue to next method
+            return orjson.loads(content[start:end + 1])
+        except orjson.JSONDecodeError:
+            # Fall back to pulling out the fields one by one
             pass
     
     # If still no valid JSON, try to extract rationale and answer directly
@@ -143,8 +289,8 @@ def extract_json_from_sonar_reasoning(content):
     answer = ""
     
     # Look for rationale and answer in the text
-    rationale_match = re.search(r'"rationale"\s*:\s*"([^"]*)"', content)
-    answer_match = re.search(r'"answer"\s*:\s*"([^"]*)"', content)
+    rationale_match = RATIONALE_PATTERN.search(content)
+    answer_match = ANSWER_PATTERN.search(content)
     
     if rationale_match:
         rationale = rationale_match.group(1)
@@ -155,18 +301,34 @@ def extract_json_from_sonar_reasoning(content):
     if rationale or answer:
         return {"rationale": rationale, "answer": answer}
     
-    # Last resort: try to parse the whole content as JSON
-    try:
-        return json.loads(content)
-    except json.JSONDecodeError:
-        logger.error(f"Failed to parse JSON from content")
-        # Create a fallback response
-        return {
-            "rationale": "Failed to parse response from model",
-            "answer": "Unknown (parsing error)"
-        }
+    # The end of the content is where the JSON should have been
+    logger.error(f"Failed to parse JSON from content: {content[-PARSE_ERROR_EXCERPT:]!r}")
+    # Create a fallback response
+    return {
+        "rationale": "Failed to parse response from model",
+        "answer": "Unknown (parsing error)"
+    }
+
+def response_cache_key(ocr_result, model):
+    """
+    Build the response cache key for an OCR result.
+    
+    Case and whitespace are normalized, since OCR of the same question can differ
+    in both. The option order is kept, because answers may refer to an option by
+    its letter.
+    
+    Args:
+        ocr_result: The OCR result containing question and options
+        model (str): The Perplexity model name
+        
+    Returns:
+        tuple: The cache key
+    """
+    def normalize(text):
+        return " ".join(text.split()).casefold()
+    return (model, normalize(ocr_result.question), tuple(normalize(option) for option in ocr_result.options))
 
-async def analyze_trivia_with_perplexity(ocr_result, debug=False, model=MODEL):
+async def analyze_trivia_with_perplexity(ocr_result, debug=False, model=MODEL, validate=True):
     """
     Send the OCR result to Perplexity for analysis.
     
@@ -174,6 +336,121 @@ async def analyze_trivia_with_perplexity(ocr_result, debug=False, model=MODEL):
         ocr_result: The OCR result containing question and options
         debug (bool, optional): Whether to print debug information.
         model (str, optional): The Perplexity model to use. Defaults to MODEL.
+        validate (bool, optional): Whether to validate the response with Pydantic.
+            When False, a SimpleNamespace with the same fields is returned
+            instead. Defaults to True.
+        
+    Returns:
+        TriviaAnalysis: The parsed response from Perplexity with rationale and answer
+        or None if an error occurred
+    """
+    cache_key = None
+    if RESPONSE_CACHE_SIZE:
+        cache_key = response_cache_key(ocr_result, model)
+        cached = response_cache.get(cache_key)
+        if cached is not None:
+            response_cache.move_to_end(cache_key)
+            if debug:
+                logger.info(f"Using cached Perplexity answer for model: {model}")
+            return TriviaAnalysis(**cached) if validate else SimpleNamespace(**cached)
+    
+    if debug:
+        logger.info(f"Sending OCR result to Perplexity for analysis using model: {model}...")
+    result = await send_analysis_request(
+        functools.partial(prepare_api_request, ocr_result, model), model, debug, validate,
+        offload=False
+    )
+    
+    # Remember real answers only; failures are reported as "Error (...)" answers
+    if cache_key is not None and result is not None and not result.answer.startswith("Error ("):
+        response_cache[cache_key] = {"rationale": result.rationale, "answer": result.answer}
+        while len(response_cache) > RESPONSE_CACHE_SIZE:
+            response_cache.popitem(last=False)
+    return result
+
+async def analyze_trivia_image_with_perplexity(image, debug=False, model=MODEL, validate=True):
+    """
+    Send the screenshot itself to Perplexity for analysis, without waiting for OCR.
+    
+    Args:
+        image (PIL.Image): The image to analyze
+        debug (bool, optional): Whether to print debug information.
+        model (str, optional): The Perplexity model to use. Defaults to MODEL.
+        validate (bool, optional): Whether to validate the response with Pydantic.
+            Defaults to True.
+        
+    Returns:
+        TriviaAnalysis: The parsed response from Perplexity with rationale and answer
+        or None if an error occurred
+    """
+    if debug:
+        logger.info(f"Sending image to Perplexity for analysis using model: {model}...")
+    return await send_analysis_request(
+        functools.partial(prepare_image_api_request, image, model), model, debug, validate
+    )
+
+async def post_request(body, headers):
+    """
+    Send a request body to the API, retrying failures that are safe to retry.
+    
+    Connection failures (including pooled keep-alive connections the server has
+    already closed) and 502/503/504 responses are retried with jittered backoff.
+    All attempts together are bounded by API_TIMEOUT.
+    
+    Args:
+        body (bytes): The serialized API request payload
+        headers (dict): The request headers
+        
+    Returns:
+        tuple: The response status and, for a 200 response, the decoded JSON body
+        or otherwise the error text
+    
+    Raises:
+        asyncio.TimeoutError: If API_TIMEOUT runs out
+    """
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + API_TIMEOUT
+    attempt = 0
+    while True:
+        remaining = deadline - loop.time()
+        if remaining <= 0:
+            raise asyncio.TimeoutError()
+        timeout = aiohttp.ClientTimeout(total=remaining, sock_connect=min(CONNECT_TIMEOUT, remaining))
+        
+        try:
+            async with get_request_limiter(), get_session().post(
+                API_ENDPOINT,
+                headers=headers,
+                data=body,
+                timeout=timeout
+            ) as response:
+                if response.status == 200:
+                    return response.status, await response.json(loads=orjson.loads)
+                if response.status not in RETRY_STATUSES or attempt >= MAX_RETRIES:
+                    return response.status, await response.text()
+                reason = f"status {response.status}"
+        except aiohttp.ClientConnectionError as e:
+            if attempt >= MAX_RETRIES:
+                raise
+            reason = str(e) or type(e).__name__
+        
+        # Back off before retrying, with jitter so parallel requests don't retry in lockstep
+        attempt += 1
+        delay = min(RETRY_BACKOFF * 2 ** (attempt - 1), 1.0) + random.random() * 0.1
+        logger.warning(f"Perplexity request failed ({reason}), retrying in {delay:.2f} seconds")
+        await asyncio.sleep(min(delay, max(deadline - loop.time(), 0)))
+
+async def send_analysis_request(prepare, model, debug=False, validate=True, offload=True):
+    """
+    Build a request, send it to Perplexity and parse the answer.
+    
+    Args:
+        prepare: Callable returning the API request payload
+        model (str): The Perplexity model the request is for
+        debug (bool, optional): Whether to print debug information.
+        validate (bool, optional): Whether to validate the response with Pydantic.
+        offload (bool, optional): Build and serialize the request on the thread pool.
+            Only worth the thread hop when the request encodes an image. Defaults to True.
         
     Returns:
         TriviaAnalysis: The parsed response from Perplexity with rationale and answer
@@ -183,18 +460,17 @@ async def analyze_trivia_with_perplexity(ocr_result, debug=False, model=MODEL):
         logger.error("Perplexity API key not found. Please set it in the .env file.")
         return None
     
-    if debug:
-        logger.info(f"Sending OCR result to Perplexity for analysis using model: {model}...")
     start_time = time.time()
     
-    # Prepare the API request in a separate thread to avoid blocking
-    loop = asyncio.get_event_loop()
+    loop = asyncio.get_running_loop()
     try:
-        # Run the request preparation in a thread pool to avoid blocking the event loop
-        request = await loop.run_in_executor(
-            thread_pool, 
-            functools.partial(prepare_api_request, ocr_result, model)
-        )
+        if offload:
+            # Build and serialize the request on the thread pool to avoid blocking the
+            # event loop; orjson is much faster than json on the base64 image payloads
+            body = await loop.run_in_executor(thread_pool, lambda: orjson.dumps(prepare()))
+        else:
+            # A text request takes microseconds to build, less than the thread hop
+            body = orjson.dumps(prepare())
         
         # Set up headers for the API request
         headers = {
@@ -204,23 +480,14 @@ async def analyze_trivia_with_perplexity(ocr_result, debug=False, model=MODEL):
         
         # Call the Perplexity API with timeout
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.post(
-                    API_ENDPOINT,
-                    headers=headers,
-                    json=request,
-                    timeout=API_TIMEOUT
-                ) as response:
-                    if response.status != 200:
-                        error_text = await response.text()
-                        logger.error(f"Perplexity API error: {response.status} - {error_text}")
-                        return TriviaAnalysis(
-                            rationale=f"API error: {response.status}",
-                            answer="Error (API failed)"
-                        )
-                    
-                    result = await response.json()
-                    
+            status, result = await post_request(body, headers)
+            if status != 200:
+                logger.error(f"Perplexity API error: {status} - {result}")
+                return TriviaAnalysis(
+                    rationale=f"API error: {status}",
+                    answer="Error (API failed)"
+                )
+            
             if debug:
                 elapsed = time.time() - start_time
                 logger.info(f"Perplexity response received in {elapsed:.3f} seconds")
@@ -236,10 +503,15 @@ async def analyze_trivia_with_perplexity(ocr_result, debug=False, model=MODEL):
                     parsed_content = extract_json_from_sonar_reasoning(content)
                 else:
                     # For other models, parse the content directly as JSON
-                    parsed_content = json.loads(content)
+                    parsed_content = orjson.loads(content)
                 
+                if not validate:
+                    return SimpleNamespace(
+                        rationale=parsed_content.get("rationale", ""),
+                        answer=parsed_content.get("answer", "")
+                    )
                 return TriviaAnalysis(**parsed_content)
-            except json.JSONDecodeError as e:
+            except orjson.JSONDecodeError as e:
                 logger.error(f"Failed to parse JSON response: {e}")
                 logger.error(f"Raw content: {content}")
                 return TriviaAnalysis(
@@ -266,10 +538,6 @@ async def analyze_trivia_with_perplexity(ocr_result, debug=False, model=MODEL):
             answer="Error (preparation failed)"
         )
 
-def shutdown():
-    """Shutdown the thread pool"""
-    thread_pool.shutdown(wait=False)
-
 def set_api_timeout(timeout):
     """Set the API timeout value"""
     global API_TIMEOUT
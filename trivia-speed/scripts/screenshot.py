@@ -17,7 +17,11 @@ from typing import Optional, Tuple, Union
 import logging
 import io
 import base64
-import functools
+import threading
+import weakref
+
+# Thread pool for background saves, waited on at exit
+from executors import save_pool
 
 # Configure logging
 logger = logging.getLogger('trivia-speed')
@@ -27,8 +31,93 @@ SCRIPT_DIR = Path(__file__).parent.absolute()
 SCREENSHOTS_DIR = SCRIPT_DIR / ".." / "screenshots"
 SCREENSHOTS_DIR.mkdir(exist_ok=True)
 
-# Thread pool for CPU-bound tasks
-thread_pool = concurrent.futures.ThreadPoolExecutor(max_workers=4)
+# MIME types of the formats prepare_image_for_api can produce
+IMAGE_MIME_TYPES = {
+    "JPEG": "image/jpeg",
+    "WEBP": "image/webp",
+    "PNG": "image/png"
+}
+# libwebp's fastest method; higher methods shrink the output a little more
+# but take several times longer to encode
+WEBP_METHOD = 0
+
+# Encodings produced by prepare_image_for_api, keyed by id(image) and then by the
+# encoding parameters. Providers that ask for the same encoding of the same
+# screenshot share a single encode; entries are dropped when the image is freed.
+encoded_images = {}
+encoded_images_lock = threading.Lock()
+
+# One open mss instance per thread, see get_capture_session()
+capture_sessions = threading.local()
+
+def save_image_in_background(image, path, debug=False, **save_kwargs):
+    """
+    Save an image to disk on the save pool so the caller doesn't wait on encoding and I/O.
+    
+    Args:
+        image (PIL.Image): The image to save. It must not be modified afterwards.
+        path (str): Where to save the image
+        debug (bool, optional): Whether to log when the save completes
+        **save_kwargs: Extra arguments passed to Image.save
+        
+    Returns:
+        concurrent.futures.Future: Completes when the image has been written
+    """
+    def save():
+        try:
+            image.save(path, **save_kwargs)
+            if debug:
+                logger.info(f"Saved screenshot to {path}")
+        except Exception as e:
+            logger.error(f"Failed to save screenshot to {path}: {e}")
+    return save_pool.submit(save)
+
+def resize_image(image, resize_factor):
+    """
+    Resize an image by a scale factor.
+    
+    Downscaling uses area averaging (like OpenCV's INTER_AREA), which keeps text
+    legible and is several times faster than Lanczos. For whole-number
+    reductions such as 0.5, Image.reduce averages pixel blocks directly, which
+    is another few times faster again.
+    
+    Args:
+        image (PIL.Image): The image to resize
+        resize_factor (float): Scale factor, e.g. 0.5 for half size
+        
+    Returns:
+        PIL.Image: The resized image
+    """
+    if resize_factor < 1.0:
+        reduce_factor = 1 / resize_factor
+        if reduce_factor.is_integer():
+            factor = int(reduce_factor)
+            # Drop the partial block at the edges so the size matches int(width * factor)
+            box = (0, 0, image.width - image.width % factor, image.height - image.height % factor)
+            return image.reduce(factor, box=box)
+        new_size = (int(image.width * resize_factor), int(image.height * resize_factor))
+        return image.resize(new_size, Image.BOX)
+    
+    new_size = (int(image.width * resize_factor), int(image.height * resize_factor))
+    return image.resize(new_size, Image.LANCZOS)
+
+def get_capture_session():
+    """
+    Get this thread's mss instance, creating it on first use.
+    
+    Opening an instance connects to the display and queries the monitors, which
+    used to happen on every capture. Instances are kept per thread because some
+    backends (e.g. Xlib) must only be used from the thread that created them.
+    The monitor layout is read once per instance, so a background server has to
+    be restarted after the screen resolution changes.
+    
+    Returns:
+        mss.base.MSSBase: The capture session
+    """
+    sct = getattr(capture_sessions, "sct", None)
+    if sct is None:
+        sct = capture_sessions.sct = mss.mss()
+    return sct
 
 def take_right_third_screenshot(
     output_path: Optional[str] = None, 
@@ -40,6 +129,9 @@ def take_right_third_screenshot(
     """
     Take a screenshot of the right third of the screen.
     
+    The image is returned as soon as it has been captured and resized; writing it
+    (and the optional unmodified copy) to disk happens on a background thread.
+    
     Args:
         output_path: Path to save the screenshot. If None, saves to 'screenshots' folder with timestamp.
         quality: JPEG quality (1-100). Default is 60.
@@ -48,78 +140,73 @@ def take_right_third_screenshot(
         save_copy: Path to save an unmodified copy of the screenshot.
     
     Returns:
-        Tuple[str, Image.Image]: Path to the saved screenshot and the PIL Image object.
+        Tuple[str, Image.Image]: Path the screenshot is being saved to and the PIL Image object.
     """
     start_time = time.time()
     
-    # Get screen dimensions
-    with mss.mss() as sct:
-        monitor = sct.monitors[1]  # Primary monitor
-        screen_width = monitor["width"]
-        screen_height = monitor["height"]
-        
-        # Calculate the right third of the screen
-        right_third_width = screen_width * .29
-        right_third_x = screen_width - right_third_width
-
-        left_padding = 30
-        right_padding = 30
-        top_padding = 430
-        bottom_padding = 80
-        
-        # Define the region to capture
-        region = {
-            "top": 0 + top_padding,
-            "left": right_third_x + left_padding,
-            "width": right_third_width - left_padding - right_padding,
-            "height": screen_height - top_padding - bottom_padding
-        }
-        
-        if debug:
-            logger.info(f"Taking screenshot of region: {region}")
-        
-        # Capture the screenshot
-        screenshot = sct.grab(region)
-        
-        # Convert to PIL Image
-        img = Image.frombytes("RGB", screenshot.size, screenshot.bgra, "raw", "BGRX")
-        
-        # Save an unmodified copy if requested
-        if save_copy:
-            if save_copy is True:  # If no path provided, use default
-                timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-                original_path = str(SCREENSHOTS_DIR / f"original_{timestamp}.png")
-            else:
-                original_path = save_copy
-                
-            img.save(original_path)
-            if debug:
-                logger.info(f"Saved original screenshot to {original_path}")
+    # Get screen dimensions from this thread's capture session
+    sct = get_capture_session()
+    monitor = sct.monitors[1]  # Primary monitor
+    screen_width = monitor["width"]
+    screen_height = monitor["height"]
+    
+    # Calculate the right third of the screen
+    right_third_width = screen_width * .29
+    right_third_x = screen_width - right_third_width
+
+    left_padding = 30
+    right_padding = 30
+    top_padding = 430
+    bottom_padding = 80
+    
+    # Define the region to capture
+    region = {
+        "top": 0 + top_padding,
+        "left": right_third_x + left_padding,
+        "width": right_third_width - left_padding - right_padding,
+        "height": screen_height - top_padding - bottom_padding
+    }
+    
+    if debug:
+        logger.info(f"Taking screenshot of region: {region}")
+    
+    # Capture the screenshot
+    screenshot = sct.grab(region)
+    
+    # Convert to PIL Image
+    img = Image.frombytes("RGB", screenshot.size, screenshot.bgra, "raw", "BGRX")
+    
+    # Save an unmodified copy if requested
+    if save_copy:
+        if save_copy is True:  # If no path provided, use default
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            original_path = str(SCREENSHOTS_DIR / f"original_{timestamp}.png")
+        else:
+            original_path = save_copy
+            
+        save_image_in_background(img, original_path, debug)
     
     # Resize the image if requested
     if resize_factor != 1.0:
-        new_width = int(img.width * resize_factor)
-        new_height = int(img.height * resize_factor)
-        img = img.resize((new_width, new_height), Image.LANCZOS)
+        img = resize_image(img, resize_factor)
         if debug:
-            logger.info(f"Resized image to {new_width}x{new_height}")
+            logger.info(f"Resized image to {img.width}x{img.height}")
     
     # Save the processed image
     if output_path is None:
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         output_path = str(SCREENSHOTS_DIR / f"screenshot_{timestamp}.jpg")
     
-    # Save as JPEG with specified quality
-    img.save(output_path, "JPEG", quality=quality)
+    # Save as JPEG with specified quality off the critical path
+    save_image_in_background(img, output_path, debug, format="JPEG", quality=quality)
     
     if debug:
         elapsed = time.time() - start_time
-        logger.info(f"Screenshot taken and saved to {output_path} in {elapsed:.3f} seconds")
+        logger.info(f"Screenshot taken in {elapsed:.3f} seconds, saving to {output_path}")
         logger.info(f"Image dimensions: {img.width}x{img.height}, Quality: {quality}")
     
     return output_path, img
 
-@functools.lru_cache(maxsize=8)
 def encode_image_to_base64(image_bytes):
     """
     Encode image bytes to base64.
@@ -132,24 +219,81 @@ def encode_image_to_base64(image_bytes):
     """
     return base64.b64encode(image_bytes).decode('utf-8')
 
-def prepare_image_for_api(image):
+def prepare_image_for_api(image, quality=85, max_dimension=None, image_format="JPEG"):
     """
     Prepare an image for the OpenAI API by converting it to base64.
     
+    The result is memoized per image and parameters, so concurrent providers
+    asking for the same encoding wait for one encode instead of each doing it.
+    The image must not be modified after it has been prepared.
+    
     Args:
         image (PIL.Image): The image to prepare
+        quality (int, optional): JPEG/WebP quality (1-100). Defaults to 85.
+        max_dimension (int, optional): Downscale so neither side exceeds this many
+            pixels before encoding. Defaults to None (no downscaling).
+        image_format (str, optional): One of the IMAGE_MIME_TYPES formats. Defaults to "JPEG".
+        
+    Returns:
+        str: Base64 encoded image
+    """
+    key = (quality, max_dimension, image_format)
+    with encoded_images_lock:
+        encodings = encoded_images.get(id(image))
+        if encodings is None:
+            encodings = encoded_images[id(image)] = {}
+            # Forget the encodings once the image is garbage collected
+            weakref.finalize(image, encoded_images.pop, id(image), None)
+        future = encodings.get(key)
+        if future is None:
+            future = encodings[key] = concurrent.futures.Future()
+            is_owner = True
+        else:
+            is_owner = False
+    
+    # Another thread is already encoding, or has encoded, this image
+    if not is_owner:
+        return future.result()
+    
+    try:
+        result = encode_image_for_api(image, quality, max_dimension, image_format)
+    except BaseException as e:
+        # Let a later call retry instead of caching the failure
+        with encoded_images_lock:
+            encodings.pop(key, None)
+        future.set_exception(e)
+        raise
+    future.set_result(result)
+    return result
+
+def encode_image_for_api(image, quality, max_dimension, image_format):
+    """
+    Encode an image to base64 without memoization.
+    
+    Args:
+        image (PIL.Image): The image to encode
+        quality (int): JPEG/WebP quality (1-100)
+        max_dimension (int): Downscale so neither side exceeds this many pixels
+            before encoding, or None for no downscaling
+        image_format (str): One of the IMAGE_MIME_TYPES formats
         
     Returns:
         str: Base64 encoded image
     """
-    # Convert to JPEG in memory
+    # Downscale a copy so the caller's image is left untouched
+    if max_dimension and max(image.size) > max_dimension:
+        image = image.copy()
+        image.thumbnail((max_dimension, max_dimension), Image.LANCZOS)
+    
+    # Encode in memory
     buffer = io.BytesIO()
-    image.save(buffer, format="JPEG", quality=85)
+    if image_format == "WEBP":
+        image.save(buffer, format="WEBP", quality=quality, method=WEBP_METHOD)
+    elif image_format == "PNG":
+        image.save(buffer, format="PNG")
+    else:
+        image.save(buffer, format="JPEG", quality=quality)
     buffer.seek(0)
     
     # Encode to base64
     return encode_image_to_base64(buffer.getvalue())
-
-def shutdown():
-    """Shutdown the thread pool"""
-    thread_pool.shutdown(wait=False) 
\ No newline at end of file
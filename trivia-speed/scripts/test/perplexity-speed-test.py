@@ -1,3 +1,4 @@
+import orjson
 import requests
 import time
 from dotenv import load_dotenv
@@ -20,6 +21,10 @@ if not api_key:
 url = "https://api.perplexity.ai/chat/completions"
 headers = {"Authorization": f"Bearer {api_key}", "Content-Type": "application/json"}
 
+# Keep-alive session, so the timed request doesn't pay for the TCP + TLS handshake
+session = requests.Session()
+session.headers.update(headers)
+
 # Sample question for testing
 question = "What company created the iPhone?"
 options = ["1. Samsung", "2. Apple", "3. Google", "4. Microsoft"]
@@ -63,14 +68,21 @@ payload = {
     }
 }
 
+# Open the connection first, like perplexity.prewarm() does while OCR runs, so the
+# latency below is the model's and not the handshake's
+try:
+    session.head(url, timeout=5)
+except requests.RequestException as e:
+    print(f"Connection warm-up failed: {e}")
+
 start_time = time.time()
-response = requests.post(url, json=payload, headers=headers)
+response = session.post(url, json=payload)
 latency = time.time() - start_time
 print(f"Latency: {latency:.3f} seconds")
 
 # Parse the response using the Pydantic model
 try:
-    result = response.json()
+    result = orjson.loads(response.content)
     content = result["choices"][0]["message"]["content"]
     analysis = TriviaAnalysis.model_validate_json(content)
     print("\nStructured Response:")
@@ -78,4 +90,4 @@ try:
     print(f"Answer: {analysis.answer}")
 except Exception as e:
     print("\nError parsing response:", e)
-    print("Raw response:", response.json())
\ No newline at end of file
+    print("Raw response:", response.text)
\ No newline at end of file
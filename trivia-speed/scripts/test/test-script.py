@@ -9,16 +9,17 @@ tracks the time taken, and checks if the answers are correct.
 import os
 import sys
 import time
-import subprocess
 import argparse
 from pathlib import Path
 import re
 import asyncio
-import concurrent.futures
 
 # Add the parent directory to the path so we can import from src
 sys.path.append(str(Path(__file__).parent.parent.parent))
 
+# The script under test, run once per screenshot and model
+MAIN_PY = str(Path(__file__).parent.parent / "main.py")
+
 # Define the expected answers for each screenshot
 EXPECTED_ANSWERS = {
     "tesla.jpg": ["Tesla", "TSLA"],
@@ -30,53 +31,42 @@ EXPECTED_ANSWERS = {
     "Lineage.jpg": ["Lineage"]
 }
 
-def run_main_on_screenshot(screenshot_path, model="gpt", debug=False, verbose=False):
+# Command prefix for running main.py. The OCR cache is skipped so every run
+# times a real Gemini call instead of a hit from an earlier run
+BASE_CMD = ("python", MAIN_PY, "--no-ocr-cache")
+
+# main.py flags that limit a run to the model under test
+MODEL_FLAGS = {
+    "gpt": ("--no-mistral", "--no-gemini", "--no-sonar", "--no-sonar-pro", "--no-sonar-reasoning"),
+    "mistral": ("--no-gpt", "--no-gemini", "--no-sonar", "--no-sonar-pro", "--no-sonar-reasoning"),
+    "gemini": ("--no-gpt", "--no-mistral", "--no-sonar", "--no-sonar-pro", "--no-sonar-reasoning"),
+    "sonar": ("--only-sonar",),
+    "sonar-pro": ("--only-sonar-pro",),
+    "sonar-reasoning": ("--only-sonar-reasoning",)
+}
+
+# Matches everything but digits, to compare numbers with/without commas or dollar signs
+NON_DIGITS = re.compile(r"\D")
+
+async def run_main_on_screenshot(screenshot_path, model="gpt", debug=False, verbose=False):
     """Run main.py on a screenshot and return the output and time taken"""
     start_time = time.time()
     
-    # Run main.py with the screenshot path
-    cmd = [
-        "python", 
-        str(Path(__file__).parent.parent / "main.py"),
-    ]
-    
-    # Add debug flag if requested
-    if debug:
-        cmd.append("--debug")
-    
-    # Add model-specific flags
-    if model == "gpt":
-        cmd.append("--no-mistral")
-        cmd.append("--no-gemini")
-        cmd.append("--no-sonar")
-        cmd.append("--no-sonar-pro")
-        cmd.append("--no-sonar-reasoning")
-    elif model == "mistral":
-        cmd.append("--no-gpt")
-        cmd.append("--no-gemini")
-        cmd.append("--no-sonar")
-        cmd.append("--no-sonar-pro")
-        cmd.append("--no-sonar-reasoning")
-    elif model == "gemini":
-        cmd.append("--no-gpt")
-        cmd.append("--no-mistral")
-        cmd.append("--no-sonar")
-        cmd.append("--no-sonar-pro")
-        cmd.append("--no-sonar-reasoning")
-    elif model == "sonar":
-        cmd.append("--only-sonar")
-    elif model == "sonar-pro":
-        cmd.append("--only-sonar-pro")
-    elif model == "sonar-reasoning":
-        cmd.append("--only-sonar-reasoning")
-    
-    # Add the screenshot path
-    cmd.append(screenshot_path)
+    # Run main.py with the model's flags on the screenshot path
+    cmd = [*BASE_CMD, *(["--debug"] if debug else []), *MODEL_FLAGS.get(model, ()), screenshot_path]
     
     if verbose:
         print(f"Running command: {' '.join(cmd)}")
     
-    result = subprocess.run(cmd, capture_output=True, text=True)
+    # The event loop waits on the process directly, so concurrent runs don't need threads
+    process = await asyncio.create_subprocess_exec(
+        *cmd,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE
+    )
+    stdout, stderr = await process.communicate()
+    stdout = stdout.decode(errors="replace")
+    stderr = stderr.decode(errors="replace")
     
     end_time = time.time()
     time_taken = end_time - start_time
@@ -87,10 +77,10 @@ def run_main_on_screenshot(screenshot_path, model="gpt", debug=False, verbose=Fa
         print("The API might not be getting called. Try running with --debug to see more details.")
     
     if verbose:
-        print(f"STDOUT: {result.stdout}")
-        print(f"STDERR: {result.stderr}")
+        print(f"STDOUT: {stdout}")
+        print(f"STDERR: {stderr}")
     
-    return result.stdout.strip(), time_taken
+    return stdout.strip(), time_taken
 
 def check_answer(output, expected_answers):
     """Check if the output contains any of the expected answers"""
@@ -105,6 +95,10 @@ def check_answer(output, expected_answers):
     extracted = extract_answer(output)
     extracted_lower = extracted.lower() if extracted else ""
     
+    # Digit-only versions for numeric answers, computed once for all expected answers
+    output_digits = NON_DIGITS.sub("", output)
+    extracted_digits = NON_DIGITS.sub("", extracted) if extracted else ""
+    
     # Check if any of the expected answers are in the output or extracted answer
     for expected in expected_answers:
         expected_lower = expected.lower()
@@ -118,12 +112,8 @@ def check_answer(output, expected_answers):
             return True
         
         # Special case for numbers with/without commas or dollar signs
-        if any(c.isdigit() for c in expected):
-            # Remove non-digit characters for comparison
-            expected_digits = ''.join(c for c in expected if c.isdigit())
-            output_digits = ''.join(c for c in output if c.isdigit())
-            extracted_digits = ''.join(c for c in extracted if c.isdigit())
-            
+        expected_digits = NON_DIGITS.sub("", expected)
+        if expected_digits:
             if expected_digits in output_digits or expected_digits in extracted_digits:
                 return True
     
@@ -163,13 +153,8 @@ async def process_screenshot(screenshot_file, model, args):
     # Display the first expected answer in the table
     display_expected = expected_answers[0] if isinstance(expected_answers, list) else expected_answers
     
-    # Run main.py on the screenshot (in a thread pool to avoid blocking)
-    loop = asyncio.get_event_loop()
-    with concurrent.futures.ThreadPoolExecutor() as pool:
-        output, time_taken = await loop.run_in_executor(
-            pool, 
-            lambda: run_main_on_screenshot(str(screenshot_file), model, args.debug, args.verbose)
-        )
+    # Run main.py on the screenshot
+    output, time_taken = await run_main_on_screenshot(str(screenshot_file), model, args.debug, args.verbose)
     
     # Extract the answer from the output
     actual_answer = extract_answer(output)
@@ -186,7 +171,7 @@ async def process_screenshot(screenshot_file, model, args):
         "time_taken": time_taken
     }
 
-async def process_screenshots_async(screenshots_dir, model, args):
+async def process_screenshots_async(screenshot_files, model, args):
     """Process all screenshots for a specific model asynchronously and return results"""
     print(f"\n{'='*50}")
     print(f"Running tests with {model.upper()} model")
@@ -197,7 +182,7 @@ async def process_screenshots_async(screenshots_dir, model, args):
     
     # Create tasks for all screenshots
     tasks = []
-    for screenshot_file in screenshots_dir.glob("*.jpg"):
+    for screenshot_file in screenshot_files:
         task = process_screenshot(screenshot_file, model, args)
         tasks.append(task)
     
@@ -228,8 +213,9 @@ async def process_screenshots_async(screenshots_dir, model, args):
 
 async def main_async(args):
     """Async version of main function"""
-    # Get the path to the screenshots folder
+    # List the screenshots once; every model runs on the same files
     screenshots_dir = Path(__file__).parent / "screenshots"
+    screenshot_files = sorted(screenshots_dir.glob("*.jpg"))
     
     # Check if all models are disabled
     if (args.no_gpt and args.no_mistral and args.no_gemini and 
@@ -242,27 +228,27 @@ async def main_async(args):
     
     # Process GPT
     if not args.no_gpt:
-        results["gpt"] = await process_screenshots_async(screenshots_dir, "gpt", args)
+        results["gpt"] = await process_screenshots_async(screenshot_files, "gpt", args)
     
     # Process Mistral
     if not args.no_mistral:
-        results["mistral"] = await process_screenshots_async(screenshots_dir, "mistral", args)
+        results["mistral"] = await process_screenshots_async(screenshot_files, "mistral", args)
     
     # Process Gemini
     if not args.no_gemini:
-        results["gemini"] = await process_screenshots_async(screenshots_dir, "gemini", args)
+        results["gemini"] = await process_screenshots_async(screenshot_files, "gemini", args)
     
     # Process Sonar
     if not args.no_sonar:
-        results["sonar"] = await process_screenshots_async(screenshots_dir, "sonar", args)
+        results["sonar"] = await process_screenshots_async(screenshot_files, "sonar", args)
     
     # Process Sonar Pro
     if not args.no_sonar_pro:
-        results["sonar-pro"] = await process_screenshots_async(screenshots_dir, "sonar-pro", args)
+        results["sonar-pro"] = await process_screenshots_async(screenshot_files, "sonar-pro", args)
     
     # Process Sonar Reasoning
     if not args.no_sonar_reasoning:
-        results["sonar-reasoning"] = await process_screenshots_async(screenshots_dir, "sonar-reasoning", args)
+        results["sonar-reasoning"] = await process_screenshots_async(screenshot_files, "sonar-reasoning", args)
     
     # Print comparison if multiple models were tested
     if len(results) > 1:
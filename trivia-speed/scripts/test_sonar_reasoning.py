@@ -5,6 +5,8 @@ Test script for the sonar-reasoning model output handling in perplexity.py.
 
 import json
 import logging
+import os
+import time
 from perplexity import extract_json_from_sonar_reasoning, TriviaAnalysis
 
 # Configure logging
@@ -90,6 +92,23 @@ def test_regular_json():
         logger.error(f"❌ Test failed: {e}")
         return False
 
+def benchmark_extract_json(iterations=10000):
+    """
+    Time extract_json_from_sonar_reasoning on the sample output.
+    
+    Parsing is CPU-bound and holds the GIL, so the calls run back to back; fanning
+    them out over threads would measure lock contention rather than the parser.
+    
+    Args:
+        iterations (int, optional): Number of calls to time. Defaults to 10000.
+    """
+    start_time = time.perf_counter()
+    for _ in range(iterations):
+        extract_json_from_sonar_reasoning(SAMPLE_OUTPUT)
+    elapsed = time.perf_counter() - start_time
+    logger.info(f"Parsed {iterations} responses in {elapsed:.3f} seconds "
+                f"({iterations / elapsed:,.0f}/s, {elapsed / iterations * 1e6:.1f} us each)")
+
 if __name__ == "__main__":
     logger.info("Testing sonar-reasoning output handling...")
     
@@ -101,4 +120,12 @@ if __name__ == "__main__":
     if sonar_test_result and regular_test_result:
         logger.info("✅ All tests passed!")
     else:
-        logger.error("❌ Some tests failed!") 
\ No newline at end of file
+        logger.error("❌ Some tests failed!")
+    
+    # BENCH=<n> times the extractor over n calls. Unset, empty or 0 skips it
+    bench = os.getenv("BENCH", "").strip()
+    if bench.isdigit():
+        if int(bench):
+            benchmark_extract_json(int(bench))
+    elif bench:
+        logger.error(f"BENCH must be a number of calls, got {bench!r}; skipping the benchmark") 
\ No newline at end of file